@@ -6,16 +6,54 @@ problem as a constraint satisfaction problem.
 """
 
 import json
-from typing import Dict, List, Set, Tuple, Optional
+import os
+from functools import lru_cache
+from typing import (Dict, List, Set, Tuple, Optional, NamedTuple, Sequence,
+                    TYPE_CHECKING)
 from dataclasses import dataclass, field
-import networkx as nx
+import numpy as np
+
+if TYPE_CHECKING:
+    import networkx as nx
 
 
 # Default color palette for map coloring
 DEFAULT_COLORS = ['Red', 'Green', 'Blue', 'Yellow']
 
+# Sentinel stored in integer assignment arrays for unassigned variables
+UNASSIGNED = -1
+
+# Per-variable domain bitmask dtype (bit c set = color id c available)
+DOMAIN_MASK_DTYPE = np.uint32
+
+
+@lru_cache(maxsize=8)
+def _load_maps_json(json_path: str, mtime: float) -> Dict:
+    """
+    Parse a maps JSON file, memoized per path and modification time.
+    
+    The returned dict is shared between calls and must not be mutated.
+    """
+    with open(json_path, 'r') as f:
+        return json.load(f)
+
+
+class CSRAdjacency(NamedTuple):
+    """
+    Compressed sparse row adjacency of the constraint graph.
+    
+    The neighbors of variable ``i`` are ``indices[indptr[i]:indptr[i + 1]]``.
+    """
+    indptr: np.ndarray
+    indices: np.ndarray
+
+
+def _derived():
+    """Dataclass field computed in __post_init__ rather than passed in."""
+    return field(init=False, repr=False, compare=False)
 
-@dataclass
+
+@dataclass(slots=True)
 class CSPModel:
     """
     Represents a Map Coloring CSP.
@@ -23,21 +61,115 @@ class CSPModel:
     Attributes:
         variables: List of region names (nodes in the map graph)
         domains: Dict mapping each variable to its available colors
+            (treated as read-only; solvers work on copy_domains(). To
+            change it, assign a new dict or call reset_domains())
         constraints: List of (var1, var2) tuples representing adjacencies
-        graph: NetworkX graph representation of the map
         name: Optional name for the map
+        graph: NetworkX graph of the map, built on first access (only
+            needed for visualization)
+    
+    Besides the string-keyed attributes, an integer encoding is built
+    once at construction for array-based consistency checks:
+    
+        n: Number of variables
+        var_index: Dict mapping each variable to its integer index
+        colors: List of all colors appearing in the domains
+        color_index: Dict mapping each color to its integer id
+        edges_np: int32 array of shape (E, 2) with constraint indices
+        neighbors_csr: CSRAdjacency of the constraint graph
+        arcs: Directed arcs (Xi, Xj), both directions of every constraint
+        arc_src: int32 source variable of each CSR position; position p
+            is the arc (arc_src[p], neighbors_csr.indices[p])
+        arc_reverse: int32 CSR position of the opposite arc of each arc
     """
     variables: List[str]
-    domains: Dict[str, List[str]]
+    domains: Dict[str, Sequence[str]]
     constraints: List[Tuple[str, str]]
-    graph: nx.Graph = field(default_factory=nx.Graph)
     name: str = "Unnamed Map"
     
+    # Declared as fields so they get slots
+    n: int = _derived()
+    var_index: Dict[str, int] = _derived()
+    colors: List[str] = _derived()
+    color_index: Dict[str, int] = _derived()
+    edges_np: np.ndarray = _derived()
+    neighbors_csr: CSRAdjacency = _derived()
+    arcs: Tuple[Tuple[str, str], ...] = _derived()
+    arc_src: np.ndarray = _derived()
+    arc_reverse: np.ndarray = _derived()
+    _neighbors: Dict[str, Tuple[str, ...]] = _derived()
+    _neighbors_idx: List[np.ndarray] = _derived()
+    _initial_domains: Dict[str, Tuple[str, ...]] = _derived()
+    _graph: Optional['nx.Graph'] = _derived()
+    _masks: Optional[np.ndarray] = _derived()
+    _masks_domains: Optional[Dict[str, Sequence[str]]] = _derived()
+    
     def __post_init__(self):
-        """Build the NetworkX graph from constraints."""
-        self.graph = nx.Graph()
-        self.graph.add_nodes_from(self.variables)
-        self.graph.add_edges_from(self.constraints)
+        """Build the adjacency from constraints in one pass."""
+        # Dicts act as ordered sets: duplicate edges collapse and
+        # neighbors keep the order in which edges were listed
+        adj = {var: {} for var in self.variables}
+        for var1, var2 in self.constraints:
+            adj[var1][var2] = None
+            adj[var2][var1] = None
+        self._neighbors = {var: tuple(nbrs) for var, nbrs in adj.items()}
+        self.arcs = tuple(
+            arc for var1, var2 in self.constraints
+            for arc in ((var1, var2), (var2, var1))
+        )
+        self._graph = None
+        self._masks = None
+        self._masks_domains = None
+        self._initial_domains = {
+            var: tuple(values) for var, values in self.domains.items()
+        }
+        self._build_index()
+    
+    def _build_index(self):
+        """Build the integer encoding of variables, colors and edges."""
+        self.n = len(self.variables)
+        self.var_index = {var: i for i, var in enumerate(self.variables)}
+        self._build_colors()
+        
+        self.edges_np = np.array(
+            [(self.var_index[a], self.var_index[b]) for a, b in self.constraints],
+            dtype=np.int32
+        ).reshape(-1, 2)
+        
+        indptr = np.zeros(self.n + 1, dtype=np.int32)
+        indices = []
+        for i, var in enumerate(self.variables):
+            indices.extend(self.var_index[n] for n in self._neighbors[var])
+            indptr[i + 1] = len(indices)
+        self.neighbors_csr = CSRAdjacency(
+            indptr=indptr,
+            indices=np.array(indices, dtype=np.int32)
+        )
+        self._neighbors_idx = [
+            self.neighbors_csr.indices[indptr[i]:indptr[i + 1]]
+            for i in range(self.n)
+        ]
+        
+        # Arc ids are CSR positions; sorting the (src, dst) keys lets
+        # each arc find its opposite with one binary search
+        indices = self.neighbors_csr.indices
+        self.arc_src = np.repeat(np.arange(self.n, dtype=np.int32),
+                                 np.diff(indptr))
+        keys = self.arc_src.astype(np.int64) * self.n + indices
+        order = np.argsort(keys)
+        reverse_keys = indices.astype(np.int64) * self.n + self.arc_src
+        self.arc_reverse = order[
+            np.searchsorted(keys[order], reverse_keys)
+        ].astype(np.int32)
+    
+    def _build_colors(self):
+        """Number the colors in order of first appearance in the domains."""
+        # A dict keeps first-seen order and dedupes in one pass
+        seen = {}
+        for var in self.variables:
+            seen.update(dict.fromkeys(self.domains.get(var, ())))
+        self.colors = list(seen)
+        self.color_index = {color: i for i, color in enumerate(self.colors)}
     
     @classmethod
     def from_json(cls, json_path: str, map_key: str, 
@@ -45,6 +177,9 @@ class CSPModel:
         """
         Create a CSPModel from a JSON file.
         
+        The parsed file is cached, so loading several maps from the
+        same file reads and decodes it only once.
+        
         Args:
             json_path: Path to the JSON file containing map definitions
             map_key: Key of the map to load from the JSON
@@ -54,18 +189,18 @@ class CSPModel:
             CSPModel instance
         """
         if colors is None:
-            colors = DEFAULT_COLORS.copy()
+            colors = DEFAULT_COLORS
             
-        with open(json_path, 'r') as f:
-            maps_data = json.load(f)
+        maps_data = _load_maps_json(json_path, os.path.getmtime(json_path))
         
         if map_key not in maps_data:
             raise ValueError(f"Map '{map_key}' not found in {json_path}")
         
         map_data = maps_data[map_key]
-        variables = map_data['regions']
+        variables = list(map_data['regions'])
         constraints = [tuple(adj) for adj in map_data['adjacencies']]
-        domains = {var: colors.copy() for var in variables}
+        palette = tuple(colors)
+        domains = {var: palette for var in variables}
         
         return cls(
             variables=variables,
@@ -88,11 +223,12 @@ class CSPModel:
             CSPModel instance
         """
         if colors is None:
-            colors = DEFAULT_COLORS.copy()
+            colors = DEFAULT_COLORS
             
         variables = map_data['regions']
         constraints = [tuple(adj) for adj in map_data['adjacencies']]
-        domains = {var: colors.copy() for var in variables}
+        palette = tuple(colors)
+        domains = {var: palette for var in variables}
         
         return cls(
             variables=variables,
@@ -101,7 +237,18 @@ class CSPModel:
             name=map_data.get('name', 'Custom Map')
         )
     
-    def get_neighbors(self, variable: str) -> List[str]:
+    @property
+    def graph(self) -> 'nx.Graph':
+        """NetworkX graph of the map, built lazily for visualization."""
+        if self._graph is None:
+            import networkx as nx
+            
+            self._graph = nx.Graph()
+            self._graph.add_nodes_from(self.variables)
+            self._graph.add_edges_from(self.constraints)
+        return self._graph
+    
+    def get_neighbors(self, variable: str) -> Tuple[str, ...]:
         """
         Get all neighboring variables (adjacent regions).
         
@@ -109,9 +256,21 @@ class CSPModel:
             variable: The variable to get neighbors for
             
         Returns:
-            List of neighboring variable names
+            Tuple of neighboring variable names (cached, do not mutate)
+        """
+        return self._neighbors[variable]
+    
+    def get_neighbor_indices(self, var_idx: int) -> np.ndarray:
+        """
+        Get the indices of a variable's neighbors.
+        
+        Args:
+            var_idx: Index of the variable
+            
+        Returns:
+            int32 view into the CSR adjacency (do not mutate)
         """
-        return list(self.graph.neighbors(variable))
+        return self._neighbors_idx[var_idx]
     
     def is_consistent(self, variable: str, value: str, 
                       assignment: Dict[str, str]) -> bool:
@@ -126,11 +285,27 @@ class CSPModel:
         Returns:
             True if assignment is consistent, False otherwise
         """
-        for neighbor in self.get_neighbors(variable):
+        for neighbor in self._neighbors[variable]:
             if neighbor in assignment and assignment[neighbor] == value:
                 return False
         return True
     
+    def decode_assignment(self, assignment_arr: np.ndarray) -> Dict[str, str]:
+        """
+        Convert an int8 assignment array back to a dict.
+        
+        Args:
+            assignment_arr: int8 array of color ids
+            
+        Returns:
+            Dict of assigned variables to color names
+        """
+        return {
+            var: self.colors[c]
+            for var, c in zip(self.variables, assignment_arr.tolist())
+            if c != UNASSIGNED
+        }
+    
     def is_complete(self, assignment: Dict[str, str]) -> bool:
         """
         Check if assignment is complete (all variables assigned).
@@ -141,7 +316,7 @@ class CSPModel:
         Returns:
             True if all variables are assigned
         """
-        return len(assignment) == len(self.variables)
+        return len(assignment) == self.n
     
     def is_valid_solution(self, assignment: Dict[str, str]) -> bool:
         """
@@ -155,11 +330,37 @@ class CSPModel:
         """
         if not self.is_complete(assignment):
             return False
+        
+        color_index = self.color_index
+        if not all(color in color_index for color in assignment.values()):
+            # Colors outside the palette cannot be encoded; compare names
+            for var1, var2 in self.constraints:
+                if assignment[var1] == assignment[var2]:
+                    return False
+            return True
+        
+        assignment_arr = np.fromiter(
+            (color_index[assignment[var]] for var in self.variables),
+            dtype=np.int8, count=self.n
+        )
+        return self.is_valid_solution_fast(assignment_arr)
+    
+    def is_valid_solution_fast(self, assignment_arr: np.ndarray) -> bool:
+        """
+        Verify an int8-encoded complete assignment with one vectorized check.
+        
+        Args:
+            assignment_arr: int8 array of color ids
             
-        for var1, var2 in self.constraints:
-            if assignment[var1] == assignment[var2]:
-                return False
-        return True
+        Returns:
+            True if every variable is assigned and no edge is in conflict
+        """
+        if (assignment_arr == UNASSIGNED).any():
+            return False
+        edges = self.edges_np
+        return not bool(
+            (assignment_arr[edges[:, 0]] == assignment_arr[edges[:, 1]]).any()
+        )
     
     def copy_domains(self) -> Dict[str, List[str]]:
         """
@@ -168,7 +369,56 @@ class CSPModel:
         Returns:
             Copy of domains dict
         """
-        return {var: colors.copy() for var, colors in self.domains.items()}
+        return {var: list(colors) for var, colors in self.domains.items()}
+    
+    def reset_domains(self, num_colors: Optional[int] = None):
+        """
+        Restore every domain to the values the model was created with,
+        or give every variable the same palette of num_colors colors.
+        
+        Domains are shared immutable tuples, so this only rebuilds the
+        dict; no per-variable lists are allocated. The color encoding
+        is renumbered to match.
+        
+        Args:
+            num_colors: If given, use the first num_colors of
+                DEFAULT_COLORS for every variable
+        """
+        if num_colors is None:
+            self.domains = dict(self._initial_domains)
+        else:
+            palette = tuple(DEFAULT_COLORS[:num_colors])
+            self.domains = dict.fromkeys(self.variables, palette)
+        self._build_colors()
+    
+    def domain_masks(self) -> np.ndarray:
+        """
+        Encode the current domains as one bitmask per variable.
+        
+        Returns:
+            Fresh uint32 array indexed by variable; copying it is a
+            single O(n) memcpy, unlike copy_domains
+        """
+        # Domains are replaced, not edited, so the masks are encoded
+        # once per domains dict and copied on later calls
+        if self._masks_domains is not self.domains:
+            self._masks = self._encode_domains()
+            self._masks_domains = self.domains
+        return self._masks.copy()
+    
+    def _encode_domains(self) -> np.ndarray:
+        """Build the domain masks, encoding each shared palette once."""
+        masks = np.zeros(self.n, dtype=DOMAIN_MASK_DTYPE)
+        encoded = {}
+        for var, values in self.domains.items():
+            mask = encoded.get(id(values))
+            if mask is None:
+                mask = 0
+                for value in values:
+                    mask |= 1 << self.color_index[value]
+                encoded[id(values)] = mask
+            masks[self.var_index[var]] = mask
+        return masks
     
     def __str__(self) -> str:
         """String representation of the CSP."""
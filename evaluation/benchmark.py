@@ -7,20 +7,24 @@ and search statistics comparison across different algorithms.
 
 import time
 import tracemalloc
-from typing import Dict, List, Any, Optional, Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Callable, Tuple, TYPE_CHECKING
 from dataclasses import dataclass
-import pandas as pd
 
-from csp.model import CSPModel, DEFAULT_COLORS
-from solver.backtracking import BacktrackingSolver
+from csp.model import CSPModel
+from solver.backtracking import BacktrackingSolver, SolverStats
+from solver.jit import HAS_NUMBA
 from solver.inference import forward_checking, ac3_inference
 from solver.heuristics import (
-    mrv, degree_heuristic, mrv_with_degree_tiebreaker,
+    first_unassigned, mrv, degree_heuristic, mrv_with_degree_tiebreaker,
     lcv, no_order
 )
 
+if TYPE_CHECKING:
+    import pandas as pd
 
-@dataclass
+
+@dataclass(slots=True)
 class BenchmarkResult:
     """Result of a single benchmark run."""
     algorithm_name: str
@@ -35,12 +39,16 @@ class BenchmarkResult:
     solution: Optional[Dict[str, str]] = None
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary for DataFrame creation."""
+        """
+        Convert to dictionary for DataFrame creation.
+        
+        Values keep full precision; rounding is left to the report.
+        """
         return {
             'Algorithm': self.algorithm_name,
-            'Time (s)': round(self.time_seconds, 6),
-            'Time (ms)': round(self.time_seconds * 1000, 3),
-            'Memory (MB)': round(self.memory_peak_mb, 4),
+            'Time (s)': self.time_seconds,
+            'Time (ms)': self.time_seconds * 1000.0,
+            'Memory (MB)': self.memory_peak_mb,
             'Nodes Explored': self.nodes_explored,
             'Backtracks': self.backtracks,
             'Inference Calls': self.inference_calls,
@@ -62,19 +70,19 @@ class Benchmark:
     ALGORITHMS = {
         'BT': {
             'name': 'Backtracking Only',
-            'var_heuristic': None,
+            'var_heuristic': first_unassigned,
             'val_heuristic': None,
             'inference': None
         },
         'BT+FC': {
             'name': 'BT + Forward Checking',
-            'var_heuristic': None,
+            'var_heuristic': first_unassigned,
             'val_heuristic': None,
             'inference': forward_checking
         },
         'BT+AC3': {
             'name': 'BT + AC-3',
-            'var_heuristic': None,
+            'var_heuristic': first_unassigned,
             'val_heuristic': None,
             'inference': ac3_inference
         },
@@ -113,6 +121,13 @@ class Benchmark:
             'var_heuristic': mrv_with_degree_tiebreaker,
             'val_heuristic': lcv,
             'inference': ac3_inference
+        },
+        'BT+FC+MRV+JIT': {
+            'name': 'BT + FC + MRV (JIT)',
+            'var_heuristic': mrv,
+            'val_heuristic': None,
+            'inference': forward_checking,
+            'use_jit': True
         }
     }
     
@@ -133,18 +148,22 @@ class Benchmark:
         
         Args:
             algorithm_key: Key from ALGORITHMS dict
-            num_runs: Number of runs for averaging
+            num_runs: Number of timed runs for averaging
             
         Returns:
-            BenchmarkResult with averaged metrics
+            BenchmarkResult with averaged metrics; memory comes from
+            one extra run under tracemalloc
         """
         if algorithm_key not in self.ALGORITHMS:
             raise ValueError(f"Unknown algorithm: {algorithm_key}")
         
         config = self.ALGORITHMS[algorithm_key]
         
-        total_time = 0
-        total_memory = 0
+        # Keep JIT compilation out of the first timed run
+        if config.get('use_jit'):
+            BacktrackingSolver.warm_up_jit()
+        
+        total_time_ns = 0
         total_nodes = 0
         total_backtracks = 0
         total_inference = 0
@@ -152,44 +171,25 @@ class Benchmark:
         solution = None
         
         for _ in range(num_runs):
-            # Reset domains
-            self.csp.domains = {v: DEFAULT_COLORS.copy() 
-                               for v in self.csp.variables}
-            
-            # Create solver
-            solver = BacktrackingSolver(
-                inference=config['inference'],
-                select_variable=config['var_heuristic'],
-                order_values=config['val_heuristic']
-            )
-            
-            # Measure memory
-            tracemalloc.start()
-            start_time = time.time()
+            elapsed_ns, stats, solution = self._time_run(config)
             
-            solution = solver.solve(self.csp)
-            
-            elapsed = time.time() - start_time
-            current, peak = tracemalloc.get_traced_memory()
-            tracemalloc.stop()
-            
-            stats = solver.get_stats()
-            
-            total_time += elapsed
-            total_memory += peak / 1024 / 1024
+            total_time_ns += elapsed_ns
             total_nodes += stats.nodes_explored
             total_backtracks += stats.backtracks
             total_inference += stats.inference_calls
             total_pruned += stats.pruned_values
         
+        # Peak memory is measured in a separate, untimed pass
+        memory_peak_mb = self._memory_run(config)
+        
         # Calculate averages
         n = num_runs
         colors_used = len(set(solution.values())) if solution else 0
         
         result = BenchmarkResult(
             algorithm_name=config['name'],
-            time_seconds=total_time / n,
-            memory_peak_mb=total_memory / n,
+            time_seconds=total_time_ns / n * 1e-9,
+            memory_peak_mb=memory_peak_mb,
             nodes_explored=total_nodes // n,
             backtracks=total_backtracks // n,
             inference_calls=total_inference // n,
@@ -201,36 +201,105 @@ class Benchmark:
         
         return result
     
+    def _create_solver(self, config: Dict[str, Any]) -> BacktrackingSolver:
+        """Create a fresh solver for an ALGORITHMS configuration."""
+        return BacktrackingSolver(
+            inference=config['inference'],
+            select_variable=config['var_heuristic'],
+            order_values=config['val_heuristic'],
+            use_jit=config.get('use_jit', False)
+        )
+    
+    def _time_run(self, config: Dict[str, Any]) -> Tuple[int, SolverStats,
+                                                         Optional[Dict[str, str]]]:
+        """
+        Time one solve with no memory instrumentation active.
+        
+        Args:
+            config: Entry from ALGORITHMS
+            
+        Returns:
+            (elapsed nanoseconds, solver stats, solution)
+        """
+        self.csp.reset_domains()
+        solver = self._create_solver(config)
+        
+        start_ns = time.perf_counter_ns()
+        solution = solver.solve(self.csp)
+        elapsed_ns = time.perf_counter_ns() - start_ns
+        
+        return elapsed_ns, solver.get_stats(), solution
+    
+    def _memory_run(self, config: Dict[str, Any]) -> float:
+        """
+        Measure peak traced memory of one solve.
+        
+        tracemalloc hooks every allocation, so this run is kept out of
+        the timed runs.
+        
+        Args:
+            config: Entry from ALGORITHMS
+            
+        Returns:
+            Peak memory in MB
+        """
+        self.csp.reset_domains()
+        solver = self._create_solver(config)
+        
+        tracemalloc.start()
+        solver.solve(self.csp)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        return peak / 1024 / 1024
+    
     def run_all(self, algorithms: List[str] = None,
-                num_runs: int = 1) -> List[BenchmarkResult]:
+                num_runs: int = 1,
+                max_workers: Optional[int] = None) -> List[BenchmarkResult]:
         """
         Run benchmark for multiple algorithms.
         
+        Algorithms are independent, so each one runs in its own worker
+        process. Results keep the order of ``algorithms``.
+        
         Args:
-            algorithms: List of algorithm keys (None = run all)
+            algorithms: List of algorithm keys (None = run all; JIT
+                entries are skipped when Numba is not installed)
             num_runs: Number of runs per algorithm
+            max_workers: Worker processes (None = one per CPU,
+                1 = run serially in this process)
             
         Returns:
             List of BenchmarkResults
         """
         if algorithms is None:
-            algorithms = list(self.ALGORITHMS.keys())
-        
-        self.results = []
+            algorithms = [key for key, config in self.ALGORITHMS.items()
+                          if HAS_NUMBA or not config.get('use_jit')]
         
         for algo_key in algorithms:
-            result = self.run_single(algo_key, num_runs)
-            self.results.append(result)
+            if algo_key not in self.ALGORITHMS:
+                raise ValueError(f"Unknown algorithm: {algo_key}")
+        
+        if max_workers == 1 or len(algorithms) < 2:
+            self.results = [self.run_single(algo_key, num_runs)
+                            for algo_key in algorithms]
+            return self.results
+        
+        tasks = [(self.csp, algo_key, num_runs) for algo_key in algorithms]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            self.results = list(executor.map(_run_one, tasks))
         
         return self.results
     
-    def to_dataframe(self) -> pd.DataFrame:
+    def to_dataframe(self) -> 'pd.DataFrame':
         """
         Convert results to pandas DataFrame.
         
         Returns:
             DataFrame with benchmark results
         """
+        import pandas as pd
+        
         if not self.results:
             return pd.DataFrame()
         
@@ -252,7 +321,13 @@ class Benchmark:
         # Select columns for display
         display_cols = ['Algorithm', 'Time (ms)', 'Nodes Explored', 
                        'Backtracks', 'Memory (MB)', 'Solved']
-        print(df[display_cols].to_string(index=False))
+        print(df[display_cols].to_string(
+            index=False,
+            formatters={
+                'Time (ms)': '{:.3f}'.format,
+                'Memory (MB)': '{:.4f}'.format
+            }
+        ))
         
         print("=" * 80)
         
@@ -268,9 +343,93 @@ class Benchmark:
                   f"({least_nodes['Nodes Explored']} nodes)")
 
 
+def _run_one(task: Tuple[CSPModel, str, int]) -> BenchmarkResult:
+    """
+    Benchmark one algorithm in a worker process.
+    
+    Module-level so ProcessPoolExecutor can pickle it.
+    
+    Args:
+        task: (csp, algorithm_key, num_runs)
+        
+    Returns:
+        BenchmarkResult for the algorithm
+    """
+    csp, algorithm_key, num_runs = task
+    return Benchmark(csp).run_single(algorithm_key, num_runs)
+
+
+def solve_and_time(csp: CSPModel, solver: BacktrackingSolver) -> Dict[str, Any]:
+    """
+    Solve once and time it, without allocation tracing.
+    
+    Args:
+        csp: CSP model to solve
+        solver: Configured solver
+        
+    Returns:
+        Dict with solution, time (seconds), nodes, backtracks,
+        inference_calls and pruned
+    """
+    start_ns = time.perf_counter_ns()
+    solution = solver.solve(csp)
+    elapsed_ns = time.perf_counter_ns() - start_ns
+    
+    stats = solver.get_stats()
+    
+    return {
+        'solution': solution,
+        'time': elapsed_ns * 1e-9,
+        'nodes': stats.nodes_explored,
+        'backtracks': stats.backtracks,
+        'inference_calls': stats.inference_calls,
+        'pruned': stats.pruned_values
+    }
+
+
+def measure_peak_memory(csp: CSPModel, solver: BacktrackingSolver) -> float:
+    """
+    Peak traced memory of one extra solve.
+    
+    tracemalloc slows every allocation, so keep this out of timing.
+    
+    Args:
+        csp: CSP model to solve
+        solver: Configured solver
+        
+    Returns:
+        Peak memory in MB
+    """
+    tracemalloc.start()
+    try:
+        solver.solve(csp)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def solve_config(task: Tuple[CSPModel, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Time one solver configuration.
+    
+    Module-level so ProcessPoolExecutor can pickle it. Memory is not
+    profiled here: comparisons only need timing, and the traced pass
+    would be an extra solve per configuration.
+    
+    Args:
+        task: (csp, keyword arguments for BacktrackingSolver)
+        
+    Returns:
+        solve_and_time() result
+    """
+    csp, solver_kwargs = task
+    return solve_and_time(csp, BacktrackingSolver(**solver_kwargs))
+
+
 def run_comparison(csp: CSPModel, 
                    algorithms: List[str] = None,
-                   num_runs: int = 3) -> pd.DataFrame:
+                   num_runs: int = 3) -> 'pd.DataFrame':
     """
     Convenience function to run algorithm comparison.
     
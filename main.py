@@ -18,11 +18,10 @@ from pathlib import Path
 # Ensure the package is importable
 sys.path.insert(0, str(Path(__file__).parent))
 
-from csp.model import CSPModel, DEFAULT_COLORS
+from csp.model import CSPModel
 from solver.backtracking import BacktrackingSolver
 from solver.inference import forward_checking, ac3_inference
 from solver.heuristics import mrv_with_degree_tiebreaker, lcv
-from visualization.plotter import GraphRenderer
 from evaluation.benchmark import Benchmark, run_comparison
 
 
@@ -51,7 +50,7 @@ def run_tests():
     
     # Test 3: Forward Checking
     print("\n[Test 3] Backtracking with Forward Checking...")
-    csp.domains = {v: DEFAULT_COLORS.copy() for v in csp.variables}
+    csp.reset_domains()
     solver_fc = BacktrackingSolver(inference=forward_checking)
     solution_fc = solver_fc.solve(csp)
     assert solution_fc is not None, "FC should find a solution"
@@ -63,7 +62,7 @@ def run_tests():
     
     # Test 4: Full solver with all optimizations
     print("\n[Test 4] Full Optimized Solver (AC-3 + MRV + LCV)...")
-    csp.domains = {v: DEFAULT_COLORS.copy() for v in csp.variables}
+    csp.reset_domains()
     solver_full = BacktrackingSolver(
         inference=ac3_inference,
         select_variable=mrv_with_degree_tiebreaker,
@@ -78,6 +77,7 @@ def run_tests():
     
     # Test 5: Visualization
     print("\n[Test 5] Visualization...")
+    from visualization.plotter import GraphRenderer
     renderer = GraphRenderer()
     fig = renderer.draw_graph(csp, assignment=solution_full)
     print("  ✓ Graph rendered successfully")
@@ -95,6 +95,146 @@ def run_tests():
     assert csp_usa.is_valid_solution(solution_usa), "USA solution should be valid"
     print(f"  ✓ USA map solved: {len(set(solution_usa.values()))} colors used")
     
+    # Test 7: Compiled kernel matches the Python search
+    print("\n[Test 7] Compiled Kernel (use_jit)...")
+    import solver.backtracking as backtracking
+    from solver.heuristics import first_unassigned, mrv
+    jit_available = BacktrackingSolver.warm_up_jit()
+    
+    def solve_both(csp_model, select, inference):
+        """Solve with and without use_jit; return (solution, stats) pairs."""
+        outcomes = []
+        for use_jit in (False, True):
+            solver_cfg = BacktrackingSolver(inference=inference,
+                                            select_variable=select,
+                                            use_jit=use_jit)
+            solution_cfg = solver_cfg.solve(csp_model)
+            stats_cfg = solver_cfg.get_stats().to_dict()
+            del stats_cfg['time_elapsed']
+            outcomes.append((solution_cfg, stats_cfg))
+        return outcomes
+    
+    # 3 colors make USA unsolvable, so the search has to backtrack
+    checked = 0
+    for num_colors in (3, 4):
+        csp_usa.reset_domains(num_colors)
+        for select in (first_unassigned, mrv):
+            for inference in (None, forward_checking):
+                python_run, jit_run = solve_both(csp_usa, select, inference)
+                assert python_run == jit_run, \
+                    f"Kernel should match Python ({select.__name__})"
+                checked += 1
+    print(f"  ✓ {checked} configurations match the Python solver "
+          f"({'compiled' if jit_available else 'Numba not installed'})")
+    
+    # Without Numba, use_jit silently runs the Python search
+    has_numba = backtracking.HAS_NUMBA
+    backtracking.HAS_NUMBA = False
+    try:
+        fallback = BacktrackingSolver(select_variable=mrv, use_jit=True)
+        assert fallback._kernel_config() is None, "Kernel needs Numba"
+        python_run, jit_run = solve_both(csp_usa, mrv, forward_checking)
+        assert python_run == jit_run, "Fallback should match Python"
+    finally:
+        backtracking.HAS_NUMBA = has_numba
+    csp_usa.reset_domains()
+    print("  ✓ Falls back to the Python search without Numba")
+    
+    # Test 8: Bitmask inference prunes like the dict inference
+    print("\n[Test 8] Bitmask Inference (FC, AC-3)...")
+    import numpy as np
+    from solver.inference import ForwardChecking, AC3
+    
+    def masks_of(csp_model, domains):
+        """Encode dict domains as the bitmask array they should equal."""
+        masks = np.zeros(csp_model.n, dtype=np.uint32)
+        for var, values in domains.items():
+            for value in values:
+                color_bit = 1 << csp_model.color_index[value]
+                masks[csp_model.var_index[var]] |= color_bit
+        return masks
+    
+    for map_key in ('usa_simplified', 'europe_simplified'):
+        csp_map = CSPModel.from_json(str(maps_path), map_key)
+        for num_colors in (3, 4):
+            csp_map.reset_domains(num_colors)
+            # Assign regions in order until done or a domain wipes out,
+            # checking both encodings after every step
+            for method in (ForwardChecking, AC3):
+                domains = csp_map.copy_domains()
+                dom_mask = csp_map.domain_masks()
+                assignment = {}
+                assignment_arr = np.full(csp_map.n, -1, dtype=np.int8)
+                for var in csp_map.variables:
+                    value = domains[var][0]
+                    var_idx = csp_map.var_index[var]
+                    color_id = csp_map.color_index[value]
+                    assignment[var] = value
+                    assignment_arr[var_idx] = color_id
+                    pruned = method.infer(csp_map, var, value, assignment,
+                                          domains)
+                    pruned_bits = method.infer_bitmask(
+                        csp_map, var_idx, color_id, assignment_arr, dom_mask)
+                    if pruned is False or pruned_bits is False:
+                        assert pruned is pruned_bits, \
+                            f"{method.__name__} wipeouts should agree"
+                        break
+                    assert pruned == pruned_bits, \
+                        f"{method.__name__} should prune the same values"
+                    assert (masks_of(csp_map, domains) == dom_mask).all(), \
+                        f"{method.__name__} domains should agree"
+    
+            # Whole-map AC-3 from one singleton domain
+            domains = csp_map.copy_domains()
+            first = csp_map.variables[0]
+            domains[first] = domains[first][:1]
+            dom_mask = masks_of(csp_map, domains)
+            consistent = AC3.enforce(csp_map, domains)
+            assert consistent == AC3.enforce_bitmask(csp_map, dom_mask), \
+                "AC-3 enforce should agree"
+            if consistent:
+                assert (masks_of(csp_map, domains) == dom_mask).all(), \
+                    "AC-3 enforce domains should agree"
+    print("  ✓ Bitmask FC and AC-3 match the dict versions")
+    
+    # Test 9: AC-4 prunes exactly like AC-3
+    print("\n[Test 9] AC-4 vs AC-3...")
+    from solver.inference import AC4, ac4_inference
+    checked = 0
+    for map_key in ('usa_simplified', 'europe_simplified', 'large_grid'):
+        csp_map = CSPModel.from_json(str(maps_path), map_key)
+        for num_colors in (3, 4):
+            csp_map.reset_domains(num_colors)
+            for select, order in ((first_unassigned, None),
+                                  (mrv_with_degree_tiebreaker, lcv)):
+                runs = []
+                for inference in (ac3_inference, ac4_inference):
+                    solver_cfg = BacktrackingSolver(inference=inference,
+                                                    select_variable=select,
+                                                    order_values=order)
+                    solution_cfg = solver_cfg.solve(csp_map)
+                    stats_cfg = solver_cfg.get_stats().to_dict()
+                    del stats_cfg['time_elapsed']
+                    runs.append((solution_cfg, stats_cfg))
+                assert runs[0] == runs[1], \
+                    f"AC-4 should match AC-3 on {map_key} ({select.__name__})"
+                checked += 1
+            
+            # Whole-map enforcement from one singleton domain
+            domains_ac3 = csp_map.copy_domains()
+            first = csp_map.variables[0]
+            domains_ac3[first] = domains_ac3[first][:1]
+            domains_ac4 = {var: list(values)
+                           for var, values in domains_ac3.items()}
+            consistent = AC3.enforce(csp_map, domains_ac3)
+            pruned = AC4.enforce(csp_map, domains_ac4)
+            assert consistent == (pruned is not False), \
+                "AC-4 enforce should agree with AC-3"
+            if consistent:
+                assert domains_ac3 == domains_ac4, \
+                    "AC-4 enforce should leave the same domains"
+    print(f"  ✓ {checked} searches match AC-3 (solution, nodes, pruning)")
+    
     print("\n" + "=" * 60)
     print("All tests passed! ✓")
     print("=" * 60)
@@ -139,8 +279,9 @@ def solve_map(map_key: str, show_plot: bool = True):
         
         if show_plot:
             import matplotlib.pyplot as plt
-            renderer = GraphRenderer()
-            fig = renderer.draw_graph(csp, assignment=solution)
+            from visualization.plotter import GraphRenderer
+            renderer = GraphRenderer(interactive=True)
+            renderer.draw_graph(csp, assignment=solution)
             plt.show()
     else:
         print("✗ No solution found!")
@@ -1,15 +1,26 @@
 """
 Backtracking Solver - Core search algorithm for CSP.
 
-Implements recursive backtracking search with optional inference
-and heuristic integration.
+Implements depth-first backtracking search with optional inference
+and heuristic integration, plus an optional Numba-compiled kernel
+(solver.kernels) for the built-in heuristic/inference combinations.
 """
 
 import time
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, List, Optional, Callable, Any, Tuple
 from dataclasses import dataclass, field
 
+import numpy as np
+
 from csp.model import CSPModel
+from solver.jit import HAS_NUMBA
+from solver.inference import (AC4, forward_checking, ac3_inference,
+                              ac4_inference, undo_trail)
+from solver.heuristics import (first_unassigned, mrv,
+                               mrv_with_degree_tiebreaker, no_order)
+
+# Built-in inferences that log their removals on a trail
+_TRAILED_INFERENCES = (forward_checking, ac3_inference, ac4_inference)
 
 
 @dataclass
@@ -48,17 +59,23 @@ class BacktrackingSolver:
                  order_values: Optional[Callable] = None,
                  use_forward_checking: bool = False,
                  use_ac3: bool = False,
-                 max_nodes: int = 100000):
+                 max_nodes: int = 100000,
+                 use_jit: bool = False):
         """
         Initialize solver with optional enhancements.
         
         Args:
             inference: Inference function for domain reduction
-            select_variable: Variable selection heuristic
+            select_variable: Variable selection heuristic (default:
+                MRV with degree tiebreaker; pass first_unassigned for
+                plain chronological order)
             order_values: Value ordering heuristic
             use_forward_checking: Enable forward checking
             use_ac3: Enable AC-3 arc consistency
             max_nodes: Maximum nodes to explore before giving up
+            use_jit: Run the Numba kernel when the configuration is
+                supported (first_unassigned/mrv selection, default value
+                order, optional forward checking) and Numba is installed
         """
         self.inference = inference
         self.select_variable = select_variable
@@ -66,91 +83,200 @@ class BacktrackingSolver:
         self.use_forward_checking = use_forward_checking
         self.use_ac3 = use_ac3
         self.max_nodes = max_nodes
+        self.use_jit = use_jit
         self.stats = SolverStats()
-        
+        self._trail = None
+        self._supports = None
+    
     def solve(self, csp: CSPModel) -> Optional[Dict[str, str]]:
         """
         Solve the CSP using backtracking search.
         
         Args:
             csp: The CSP model to solve
-            
+        
         Returns:
             Solution assignment dict, or None if no solution
         """
         self.stats = SolverStats()
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
+        
+        kernel_config = self._kernel_config() if self.use_jit else None
+        if kernel_config is not None:
+            result = self._solve_jit(csp, *kernel_config)
+            self.stats.time_elapsed = (time.perf_counter_ns() - start_ns) * 1e-9
+            self.stats.solution_found = result is not None
+            return result
         
         # Make a copy of domains to avoid modifying original
         domains = csp.copy_domains()
         assignment = {}
+        # The built-in inferences log their removals, so backtracking
+        # can undo them instead of snapshotting every domain
+        self._trail = ([] if self.inference in _TRAILED_INFERENCES
+                       else None)
+        # AC-4's support counters are built once and then restored
+        # along with the trail
+        self._supports = (AC4(csp, domains)
+                          if self.inference is ac4_inference else None)
         
         result = self._backtrack(csp, assignment, domains)
         
-        self.stats.time_elapsed = time.time() - start_time
+        self.stats.time_elapsed = (time.perf_counter_ns() - start_ns) * 1e-9
         self.stats.solution_found = result is not None
         
         return result
     
+    @property
+    def runs_jit(self) -> bool:
+        """True if solve() will run the compiled kernel (see use_jit)."""
+        return self.use_jit and self._kernel_config() is not None
+    
+    @staticmethod
+    def warm_up_jit() -> bool:
+        """
+        Compile the Numba kernel ahead of the first use_jit solve.
+        
+        Returns:
+            True if the kernel is available (Numba installed)
+        """
+        if not HAS_NUMBA:
+            return False
+        from solver import kernels
+        kernels.warm_up()
+        return True
+    
+    def _kernel_config(self) -> Optional[Tuple[bool, bool]]:
+        """
+        Map the configured callables onto kernel flags.
+        
+        Returns:
+            (use_mrv, use_fc) if the compiled kernel can run this
+            configuration, otherwise None
+        """
+        if not HAS_NUMBA:
+            return None
+        if self.select_variable not in (first_unassigned, mrv):
+            return None
+        if self.order_values not in (None, no_order):
+            return None
+        if self.inference not in (None, forward_checking):
+            return None
+        return (self.select_variable is mrv,
+                self.inference is forward_checking)
+    
+    def _solve_jit(self, csp: CSPModel, use_mrv: bool,
+                   use_fc: bool) -> Optional[Dict[str, str]]:
+        """Solve with the compiled kernel and decode the result."""
+        from solver import kernels
+        
+        dom_mask = csp.domain_masks()
+        assignment = np.full(csp.n, -1, dtype=np.int8)
+        stats = np.zeros(4, dtype=np.int64)
+        
+        indptr, indices = csp.neighbors_csr
+        found = kernels.backtrack_search(indptr, indices, dom_mask, assignment,
+                                         len(csp.colors), use_mrv, use_fc,
+                                         self.max_nodes, stats)
+        
+        self.stats.nodes_explored = int(stats[kernels.NODES])
+        self.stats.backtracks = int(stats[kernels.BACKTRACKS])
+        self.stats.inference_calls = int(stats[kernels.INFERENCE_CALLS])
+        self.stats.pruned_values = int(stats[kernels.PRUNED])
+        return csp.decode_assignment(assignment) if found else None
+    
     def _backtrack(self, csp: CSPModel, assignment: Dict[str, str],
                    domains: Dict[str, List[str]]) -> Optional[Dict[str, str]]:
         """
-        Recursive backtracking search.
+        Backtracking search with an explicit stack.
+        
+        Visits the same nodes in the same order as the recursive
+        formulation, without a Python call per level (and so without
+        a recursion limit on the number of regions). Each stack frame
+        is [variable, iterator over its remaining values, undo state
+        of the value currently assigned to it].
         
         Args:
             csp: CSP model
             assignment: Current partial assignment
             domains: Current domains for each variable
-            
+        
         Returns:
             Complete assignment or None
         """
-        # Node limit check
-        if self.stats.nodes_explored >= self.max_nodes:
-            return None
-
-        # Check if assignment is complete
-        if csp.is_complete(assignment):
-            return assignment.copy()
+        stats = self.stats
+        max_nodes = self.max_nodes
+        n = csp.n
+        inference = self.inference
+        trail = self._trail
+        undo_removals = undo_trail
+        if self._supports is not None:
+            inference = self._supports.infer
+            undo_removals = self._supports.undo
+        is_consistent = csp.is_consistent
+        select_variable = self._select_variable
+        order_values = self._order_values
         
-        self.stats.nodes_explored += 1
+        stack = []
+        descend = True
         
-        # Select next unassigned variable
-        var = self._select_variable(csp, assignment, domains)
-        
-        # Get ordered domain values
-        values = self._order_values(csp, var, assignment, domains)
-        
-        for value in values:
-            if csp.is_consistent(var, value, assignment):
-                # Assign value
+        while True:
+            # Enter a new node; past the node limit it fails at once
+            if descend:
+                descend = False
+                if stats.nodes_explored < max_nodes:
+                    if len(stack) == n:
+                        return assignment.copy()
+                    
+                    stats.nodes_explored += 1
+                    var = select_variable(csp, assignment, domains)
+                    values = order_values(csp, var, assignment, domains)
+                    stack.append([var, iter(values), None])
+            
+            if not stack:
+                return None
+            
+            # Move the deepest variable on to its next value, first
+            # undoing the assignment and domain reductions of the last one
+            frame = stack[-1]
+            var, values, undo = frame
+            if var in assignment:
+                del assignment[var]
+                if trail is not None:
+                    undo_removals(domains, trail, undo)
+                elif inference is not None:
+                    domains.update(undo)
+                stats.backtracks += 1
+            
+            for value in values:
+                if not is_consistent(var, value, assignment):
+                    continue
                 assignment[var] = value
                 
-                # Save domains for restoration
-                saved_domains = {v: d.copy() for v, d in domains.items()}
-                
-                # Apply inference if enabled
-                inference_ok = True
-                if self.inference is not None:
-                    inference_result = self.inference(csp, var, value, 
-                                                       assignment, domains)
-                    self.stats.inference_calls += 1
+                # Apply inference if enabled. Only inference changes the
+                # domains, so only then is their state saved: a trail mark
+                # for the built-in inferences, a full copy otherwise.
+                if inference is not None:
+                    if trail is not None:
+                        frame[2] = len(trail)
+                        inference_result = inference(
+                            csp, var, value, assignment, domains, trail)
+                    else:
+                        frame[2] = {v: d.copy() for v, d in domains.items()}
+                        inference_result = inference(csp, var, value,
+                                                     assignment, domains)
+                    stats.inference_calls += 1
                     if inference_result is False:
-                        inference_ok = False
+                        # Undone (and the next value tried) on the next pass
+                        break
                     elif isinstance(inference_result, int):
-                        self.stats.pruned_values += inference_result
-                
-                if inference_ok:
-                    result = self._backtrack(csp, assignment, domains)
-                    if result is not None:
-                        return result
+                        stats.pruned_values += inference_result
                 
-                # Backtrack: undo assignment and restore domains
-                del assignment[var]
-                domains.update(saved_domains)
-                self.stats.backtracks += 1
-        
-        return None
+                descend = True
+                break
+            else:
+                # Values exhausted: fail back to the parent variable
+                stack.pop()
     
     def _select_variable(self, csp: CSPModel, assignment: Dict[str, str],
                          domains: Dict[str, List[str]]) -> str:
@@ -158,11 +284,8 @@ class BacktrackingSolver:
         if self.select_variable is not None:
             return self.select_variable(csp, assignment, domains)
         
-        # Default: first unassigned variable
-        for var in csp.variables:
-            if var not in assignment:
-                return var
-        return None
+        # Default: fail-first, preferring the most constraining variable
+        return mrv_with_degree_tiebreaker(csp, assignment, domains)
     
     def _order_values(self, csp: CSPModel, variable: str,
                       assignment: Dict[str, str],
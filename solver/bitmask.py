@@ -0,0 +1,28 @@
+"""
+Bitmask Module - Helpers for bitmask-encoded domains.
+
+A domain over ``k`` colors is stored as an unsigned integer where
+bit ``c`` is set iff color id ``c`` is still available. Domains of
+all variables together form a ``numpy.uint32`` array indexed by
+variable, which supports up to 32 colors.
+"""
+
+
+def popcount(mask):
+    """
+    Count the set bits (remaining values) of a domain mask.
+    
+    Written in the Numba-compatible subset so solver.kernels can
+    compile the same function.
+    
+    Args:
+        mask: Domain bitmask
+    
+    Returns:
+        Number of set bits
+    """
+    count = 0
+    while mask:
+        mask &= mask - 1
+        count += 1
+    return count
@@ -8,6 +8,25 @@ from typing import Dict, List, Tuple, Optional
 from csp.model import CSPModel
 
 
+def first_unassigned(csp: CSPModel, assignment: Dict[str, str],
+                     domains: Dict[str, List[str]]) -> str:
+    """
+    No variable ordering - the first unassigned variable.
+    
+    Args:
+        csp: CSP model
+        assignment: Current assignment
+        domains: Current domains (unused)
+        
+    Returns:
+        First unassigned variable in csp.variables order
+    """
+    for var in csp.variables:
+        if var not in assignment:
+            return var
+    return None
+
+
 def mrv(csp: CSPModel, assignment: Dict[str, str],
         domains: Dict[str, List[str]]) -> str:
     """
@@ -55,12 +74,13 @@ def degree_heuristic(csp: CSPModel, assignment: Dict[str, str],
     """
     max_degree = -1
     best_var = None
+    neighbors = csp.get_neighbors
     
     for var in csp.variables:
         if var not in assignment:
             # Count constraints with unassigned neighbors
             degree = 0
-            for neighbor in csp.get_neighbors(var):
+            for neighbor in neighbors(var):
                 if neighbor not in assignment:
                     degree += 1
             
@@ -106,9 +126,13 @@ def mrv_with_degree_tiebreaker(csp: CSPModel, assignment: Dict[str, str],
     # Break ties with degree heuristic
     max_degree = -1
     best_var = candidates[0]
+    neighbors = csp.get_neighbors
     
     for var in candidates:
-        degree = sum(1 for n in csp.get_neighbors(var) if n not in assignment)
+        degree = 0
+        for neighbor in neighbors(var):
+            if neighbor not in assignment:
+                degree += 1
         if degree > max_degree:
             max_degree = degree
             best_var = var
@@ -133,22 +157,17 @@ def lcv(csp: CSPModel, variable: str, assignment: Dict[str, str],
     Returns:
         List of values ordered by least constraining first
     """
-    value_scores = []
-    
-    for value in domains[variable]:
-        # Count how many values this eliminates from neighbors
-        eliminated = 0
-        for neighbor in csp.get_neighbors(variable):
-            if neighbor not in assignment:
-                if value in domains[neighbor]:
-                    eliminated += 1
-        
-        value_scores.append((value, eliminated))
-    
-    # Sort by eliminated count (ascending - least constraining first)
-    value_scores.sort(key=lambda x: x[1])
+    # One pass over the unassigned neighbors' domains: a value would
+    # eliminate one choice from every neighbor that still holds it
+    eliminated = {}
+    for neighbor in csp.get_neighbors(variable):
+        if neighbor not in assignment:
+            for value in domains[neighbor]:
+                eliminated[value] = eliminated.get(value, 0) + 1
     
-    return [value for value, _ in value_scores]
+    # Sort by eliminated count (ascending - least constraining first);
+    # the sort is stable, so ties keep domain order
+    return sorted(domains[variable], key=lambda v: eliminated.get(v, 0))
 
 
 def no_order(csp: CSPModel, variable: str, assignment: Dict[str, str],
@@ -184,10 +203,7 @@ def select_unassigned_variable(csp: CSPModel, assignment: Dict[str, str],
         Selected variable
     """
     if heuristic == 'none':
-        for var in csp.variables:
-            if var not in assignment:
-                return var
-        return None
+        return first_unassigned(csp, assignment, domains)
     elif heuristic == 'mrv':
         return mrv(csp, assignment, domains)
     elif heuristic == 'degree':
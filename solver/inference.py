@@ -2,13 +2,56 @@
 Inference Module - Constraint propagation techniques.
 
 Implements Forward Checking and AC-3 arc consistency algorithms
-for domain reduction during CSP solving.
+for domain reduction during CSP solving. BacktrackingSolver searches
+over string domains (dict of lists). The *_bitmask methods run the
+same pruning on bitmask domains (one uint32 per variable, see
+solver.bitmask); the solver does not call them, and the test suite
+keeps them as references checked against the list versions.
 """
 
-from typing import Dict, List, Tuple, Union, Set
+from typing import Dict, List, Optional, Tuple, Union, Set
 from collections import deque
 
-from csp.model import CSPModel
+import numpy as np
+
+from csp.model import CSPModel, DOMAIN_MASK_DTYPE
+
+# Undo log of removals from list domains: (variable, index, value)
+Trail = List[Tuple[str, int, str]]
+
+
+def remove_value(domains: Dict[str, List[str]], variable: str, value: str,
+                 trail: Optional[Trail] = None):
+    """
+    Remove value from a variable's domain, logging it on the trail.
+    
+    Args:
+        domains: Current domains (will be modified)
+        variable: Variable whose domain loses the value
+        value: Value to remove (must be in the domain)
+        trail: Optional undo log to record the removal on
+    """
+    values = domains[variable]
+    if trail is None:
+        values.remove(value)
+    else:
+        index = values.index(value)
+        del values[index]
+        trail.append((variable, index, value))
+
+
+def undo_trail(domains: Dict[str, List[str]], trail: Trail, mark: int):
+    """
+    Undo removals logged after mark, restoring each domain's order.
+    
+    Args:
+        domains: Current domains (will be modified)
+        trail: Undo log filled by remove_value
+        mark: Trail length to roll back to
+    """
+    while len(trail) > mark:
+        variable, index, value = trail.pop()
+        domains[variable].insert(index, value)
 
 
 class ForwardChecking:
@@ -22,7 +65,8 @@ class ForwardChecking:
     @staticmethod
     def infer(csp: CSPModel, variable: str, value: str,
               assignment: Dict[str, str],
-              domains: Dict[str, List[str]]) -> Union[bool, int]:
+              domains: Dict[str, List[str]],
+              trail: Optional[Trail] = None) -> Union[bool, int]:
         """
         Apply forward checking after assigning value to variable.
         
@@ -32,6 +76,7 @@ class ForwardChecking:
             value: Assigned value
             assignment: Current assignment
             domains: Current domains (will be modified)
+            trail: Optional undo log of the removals (see undo_trail)
             
         Returns:
             False if domain wipeout detected, else number of pruned values
@@ -42,7 +87,7 @@ class ForwardChecking:
             if neighbor not in assignment:
                 # Remove the assigned value from neighbor's domain
                 if value in domains[neighbor]:
-                    domains[neighbor].remove(value)
+                    remove_value(domains, neighbor, value, trail)
                     pruned += 1
                     
                     # Check for domain wipeout
@@ -50,6 +95,35 @@ class ForwardChecking:
                         return False
         
         return pruned
+    
+    @staticmethod
+    def infer_bitmask(csp: CSPModel, var_idx: int, color_id: int,
+                      assignment_arr: np.ndarray,
+                      dom_mask: np.ndarray) -> Union[bool, int]:
+        """
+        Apply forward checking on bitmask domains.
+        
+        Args:
+            csp: CSP model
+            var_idx: Index of the just-assigned variable
+            color_id: Assigned color id
+            assignment_arr: int8 assignment array
+            dom_mask: uint32 domain masks (will be modified)
+            
+        Returns:
+            False if domain wipeout detected, else number of pruned values
+        """
+        neighbors = csp.get_neighbor_indices(var_idx)
+        bit = DOMAIN_MASK_DTYPE(1 << color_id)
+        
+        # Unassigned neighbors still holding the color lose it at once
+        hit = neighbors[(assignment_arr[neighbors] < 0)
+                        & (dom_mask[neighbors] & bit != 0)]
+        dom_mask[hit] &= ~bit
+        
+        if not dom_mask[hit].all():
+            return False
+        return len(hit)
 
 
 class AC3:
@@ -71,46 +145,48 @@ class AC3:
         Returns:
             List of (Xi, Xj) arcs
         """
-        arcs = []
-        for var1, var2 in csp.constraints:
-            arcs.append((var1, var2))
-            arcs.append((var2, var1))
-        return arcs
+        return list(csp.arcs)
     
     @staticmethod
     def revise(domains: Dict[str, List[str]], 
-               xi: str, xj: str) -> bool:
+               xi: str, xj: str, trail: Optional[Trail] = None) -> bool:
         """
         Revise domain of Xi to be arc-consistent with Xj.
         
+        Specialized for the not-equal constraint between adjacent
+        regions (the only constraint type in map coloring): a value of
+        Xi has support unless Xj's domain is exactly that value, so
+        only a singleton Xj can revise Xi.
+        
         Args:
             domains: Current domains
             xi: Variable whose domain is being revised
             xj: Variable Xi must be consistent with
+            trail: Optional undo log of the removals (see undo_trail)
             
         Returns:
             True if domain of Xi was revised (reduced)
         """
-        revised = False
-        
-        # For each value in Xi's domain
-        values_to_remove = []
-        for x in domains[xi]:
-            # Check if there exists a value in Xj's domain that satisfies constraint
-            has_support = False
-            for y in domains[xj]:
-                if x != y:  # Different color constraint
-                    has_support = True
-                    break
-            
-            if not has_support:
-                values_to_remove.append(x)
-                revised = True
+        dj = domains[xj]
+        if len(dj) > 1:
+            return False
         
-        for x in values_to_remove:
-            domains[xi].remove(x)
+        # An empty Xj supports nothing
+        if not dj:
+            di = domains[xi]
+            if not di:
+                return False
+            if trail is not None:
+                # Logged last-first so undo_trail re-inserts in order
+                trail.extend((xi, index, di[index])
+                             for index in range(len(di) - 1, -1, -1))
+            del di[:]
+            return True
         
-        return revised
+        if dj[0] in domains[xi]:
+            remove_value(domains, xi, dj[0], trail)
+            return True
+        return False
     
     @classmethod
     def enforce(cls, csp: CSPModel, 
@@ -127,8 +203,18 @@ class AC3:
         Returns:
             True if arc consistency achieved, False if domain wipeout
         """
+        return cls._propagate(csp, domains, assignment) is not False
+    
+    @classmethod
+    def _propagate(cls, csp: CSPModel, domains: Dict[str, List[str]],
+                   assignment: Dict[str, str] = None,
+                   trail: Optional[Trail] = None,
+                   queue: Optional[deque] = None) -> Union[bool, int]:
+        """Run AC-3 from queue (default: all arcs), counting removals."""
         # Initialize queue with all arcs
-        queue = deque(cls.get_all_arcs(csp))
+        if queue is None:
+            queue = deque(csp.arcs)
+        pruned = 0
         
         while queue:
             xi, xj = queue.popleft()
@@ -137,21 +223,60 @@ class AC3:
             if assignment and xi in assignment:
                 continue
             
-            if cls.revise(domains, xi, xj):
+            size = len(domains[xi])
+            if cls.revise(domains, xi, xj, trail):
+                pruned += size - len(domains[xi])
                 if len(domains[xi]) == 0:
                     return False  # Domain wipeout
                 
-                # Add all arcs (Xk, Xi) where Xk is a neighbor of Xi (except Xj)
-                for xk in csp.get_neighbors(xi):
-                    if xk != xj:
-                        queue.append((xk, xi))
+                # Add all arcs (Xk, Xi) where Xk is a neighbor of Xi (except Xj).
+                # Under not-equal they can only revise once Xi is a singleton,
+                # which happens at most once, so no arc is queued twice.
+                if len(domains[xi]) == 1:
+                    for xk in csp.get_neighbors(xi):
+                        if xk != xj:
+                            queue.append((xk, xi))
+        
+        return pruned
+    
+    @classmethod
+    def enforce_bitmask(cls, csp: CSPModel, dom_mask: np.ndarray,
+                        assignment_arr: np.ndarray = None) -> bool:
+        """
+        Enforce arc consistency on bitmask domains.
         
-        return True
+        Args:
+            csp: CSP model
+            dom_mask: uint32 domain masks (will be modified)
+            assignment_arr: int8 assignment array (optional)
+            
+        Returns:
+            True if arc consistency achieved, False if domain wipeout
+        """
+        return cls._propagate_bitmask(csp, dom_mask, assignment_arr) is not False
+    
+    @staticmethod
+    def _propagate_bitmask(csp: CSPModel, dom_mask: np.ndarray,
+                           assignment_arr: np.ndarray = None) -> Union[bool, int]:
+        """Run the AC-3 kernel; False on wipeout, else values pruned."""
+        from solver import kernels
+        
+        if assignment_arr is None:
+            assignment_arr = np.full(csp.n, -1, dtype=np.int8)
+        
+        indptr, indices = csp.neighbors_csr
+        ok, pruned = kernels.ac3_enforce(indptr, indices, csp.arc_src,
+                                         csp.arc_reverse, dom_mask,
+                                         assignment_arr,
+                                         np.empty(len(indices), dtype=np.int32),
+                                         np.empty(len(indices), dtype=np.bool_))
+        return pruned if ok else False
     
     @classmethod
     def infer(cls, csp: CSPModel, variable: str, value: str,
               assignment: Dict[str, str],
-              domains: Dict[str, List[str]]) -> Union[bool, int]:
+              domains: Dict[str, List[str]],
+              trail: Optional[Trail] = None) -> Union[bool, int]:
         """
         Apply AC-3 as inference after assigning value to variable.
         
@@ -163,34 +288,224 @@ class AC3:
             value: Assigned value
             assignment: Current assignment
             domains: Current domains (will be modified)
+            trail: Optional undo log of the removals (see undo_trail)
             
         Returns:
             False if domain wipeout, else number of pruned values
-        """
-        # Count initial domain sizes
-        initial_sizes = sum(len(d) for d in domains.values())
         
-        # First apply forward checking to remove immediate conflicts
+        Domains are assumed arc consistent before the assignment, as
+        they are throughout a search that maintains arc consistency
+        from initial domains with two or more values. Propagation then
+        only has to start from the arcs into the new value.
+        """
+        # The arcs (neighbor, variable) with variable = {value} revise
+        # exactly like forward checking, so run them as AC-3's first
+        # step and queue only the arcs into neighbors left with one value
+        pruned = 0
+        queue = deque()
         for neighbor in csp.get_neighbors(variable):
             if neighbor not in assignment and value in domains[neighbor]:
-                domains[neighbor].remove(value)
+                remove_value(domains, neighbor, value, trail)
+                pruned += 1
                 if len(domains[neighbor]) == 0:
                     return False
+                if len(domains[neighbor]) == 1:
+                    for xk in csp.get_neighbors(neighbor):
+                        if xk != variable:
+                            queue.append((xk, neighbor))
         
-        # Then enforce full arc consistency
-        if not cls.enforce(csp, domains, assignment):
+        ac3_pruned = cls._propagate(csp, domains, assignment, trail, queue)
+        if ac3_pruned is False:
             return False
         
-        # Calculate pruned values
-        final_sizes = sum(len(d) for d in domains.values())
-        pruned = initial_sizes - final_sizes
+        return pruned + ac3_pruned
+    
+    @classmethod
+    def infer_bitmask(cls, csp: CSPModel, var_idx: int, color_id: int,
+                      assignment_arr: np.ndarray,
+                      dom_mask: np.ndarray) -> Union[bool, int]:
+        """
+        Apply AC-3 as inference on bitmask domains.
+        
+        Args:
+            csp: CSP model
+            var_idx: Index of the just-assigned variable
+            color_id: Assigned color id
+            assignment_arr: int8 assignment array
+            dom_mask: uint32 domain masks (will be modified)
+            
+        Returns:
+            False if domain wipeout, else number of pruned values
+        """
+        pruned = ForwardChecking.infer_bitmask(csp, var_idx, color_id,
+                                               assignment_arr, dom_mask)
+        if pruned is False:
+            return False
+        
+        ac3_pruned = cls._propagate_bitmask(csp, dom_mask, assignment_arr)
+        if ac3_pruned is False:
+            return False
+        
+        return pruned + ac3_pruned
+
+
+class AC4:
+    """
+    AC-4 (Mohr & Henderson) arc consistency with support counters.
+    
+    For every arc (Xi, Xj) and value a of Xi, a counter holds how many
+    values of Xj support a; under the not-equal constraint that is the
+    number of values of Xj other than a. Removing a value from Xj
+    decrements the counters it contributed to, and a value whose
+    counter reaches zero is removed in turn. The counters are built
+    once (O(e·d)) and then kept in step with the domains: each removal
+    costs O(d) per neighbor, and undo() adds the counts back when the
+    removal is undone. The pruning is the same as AC3's, but AC3 only
+    does work when a domain shrinks to one value, so it stays the
+    faster choice for map coloring.
+    
+    An instance belongs to one domains dict, and every removal from
+    those domains must go through infer() and every restore through
+    undo(). BacktrackingSolver keeps one instance per solve.
+    """
+    
+    def __init__(self, csp: CSPModel, domains: Dict[str, List[str]]):
+        """
+        Count the supports of every value against every neighbor.
         
+        Args:
+            csp: CSP model
+            domains: Domains the counters describe (not modified)
+        """
+        # incoming[xj]: (Xi, counts) for each neighbor Xi, where
+        # counts[a] is the number of values of Xj supporting a of Xi
+        self._incoming = {}
+        for xj in csp.variables:
+            dj = domains[xj]
+            size = len(dj)
+            self._incoming[xj] = [
+                (xi, {a: size - (a in dj) for a in domains[xi]})
+                for xi in csp.get_neighbors(xj)
+            ]
+    
+    def _remove(self, domains: Dict[str, List[str]], variable: str,
+                value: str, assignment: Dict[str, str],
+                trail: Optional[Trail], unsupported: List[Tuple[str, str]]):
+        """Remove value and withdraw its support from the neighbors."""
+        remove_value(domains, variable, value, trail)
+        # Counters of assigned neighbors are updated too (their domains
+        # are left alone), so undo() needs no assignment to reverse this
+        for xi, counts in self._incoming[variable]:
+            for a in domains[xi]:
+                if a != value:
+                    counts[a] -= 1
+                    if not counts[a] and xi not in assignment:
+                        unsupported.append((xi, a))
+    
+    def _propagate(self, domains: Dict[str, List[str]],
+                   assignment: Dict[str, str], trail: Optional[Trail],
+                   unsupported: List[Tuple[str, str]]) -> Union[bool, int]:
+        """Remove unsupported values until none is left; False on wipeout."""
+        pruned = 0
+        while unsupported:
+            xi, a = unsupported.pop()
+            # Queued once per neighbor that stopped supporting it
+            if a not in domains[xi]:
+                continue
+            self._remove(domains, xi, a, assignment, trail, unsupported)
+            pruned += 1
+            if not domains[xi]:
+                return False
         return pruned
+    
+    def infer(self, csp: CSPModel, variable: str, value: str,
+              assignment: Dict[str, str],
+              domains: Dict[str, List[str]],
+              trail: Optional[Trail] = None) -> Union[bool, int]:
+        """
+        Apply AC-4 as inference after assigning value to variable.
+        
+        Like AC3.infer, this assumes the domains were arc consistent
+        before the assignment, so only the removals it causes are
+        propagated.
+        
+        Args:
+            csp: CSP model (the one the counters were built for)
+            variable: Just-assigned variable
+            value: Assigned value
+            assignment: Current assignment
+            domains: Current domains (will be modified)
+            trail: Optional undo log of the removals (see undo)
+            
+        Returns:
+            False if domain wipeout, else number of pruned values
+        """
+        unsupported = []
+        pruned = 0
+        for neighbor in csp.get_neighbors(variable):
+            if neighbor not in assignment and value in domains[neighbor]:
+                self._remove(domains, neighbor, value, assignment, trail,
+                             unsupported)
+                pruned += 1
+                if not domains[neighbor]:
+                    return False
+        
+        ac4_pruned = self._propagate(domains, assignment, trail, unsupported)
+        if ac4_pruned is False:
+            return False
+        
+        return pruned + ac4_pruned
+    
+    def undo(self, domains: Dict[str, List[str]], trail: Trail, mark: int):
+        """
+        Undo removals logged after mark, restoring the counters too.
+        
+        Args:
+            domains: Current domains (will be modified)
+            trail: Undo log filled by infer
+            mark: Trail length to roll back to
+        """
+        while len(trail) > mark:
+            variable, index, value = trail.pop()
+            domains[variable].insert(index, value)
+            for xi, counts in self._incoming[variable]:
+                for a in domains[xi]:
+                    if a != value:
+                        counts[a] += 1
+    
+    @classmethod
+    def enforce(cls, csp: CSPModel, 
+                domains: Dict[str, List[str]],
+                assignment: Dict[str, str] = None,
+                trail: Optional[Trail] = None) -> Union[bool, int]:
+        """
+        Enforce arc consistency over the whole map.
+        
+        Args:
+            csp: CSP model
+            domains: Current domains (will be modified)
+            assignment: Current assignment (optional); assigned
+                variables keep their domains
+            trail: Optional undo log of the removals (see undo_trail)
+            
+        Returns:
+            False if domain wipeout, else number of pruned values
+        """
+        assignment = assignment or {}
+        supports = cls(csp, domains)
+        unsupported = [
+            (xi, a)
+            for incoming in supports._incoming.values()
+            for xi, counts in incoming if xi not in assignment
+            for a, count in counts.items() if not count
+        ]
+        return supports._propagate(domains, assignment, trail, unsupported)
 
 
 def forward_checking(csp: CSPModel, variable: str, value: str,
                      assignment: Dict[str, str],
-                     domains: Dict[str, List[str]]) -> Union[bool, int]:
+                     domains: Dict[str, List[str]],
+                     trail: Optional[Trail] = None) -> Union[bool, int]:
     """
     Convenience function for forward checking inference.
     
@@ -200,16 +515,18 @@ def forward_checking(csp: CSPModel, variable: str, value: str,
         value: Assigned value
         assignment: Current assignment
         domains: Current domains
+        trail: Optional undo log of the removals (see undo_trail)
         
     Returns:
         False if domain wipeout, else number of pruned values
     """
-    return ForwardChecking.infer(csp, variable, value, assignment, domains)
+    return ForwardChecking.infer(csp, variable, value, assignment, domains, trail)
 
 
 def ac3_inference(csp: CSPModel, variable: str, value: str,
                   assignment: Dict[str, str],
-                  domains: Dict[str, List[str]]) -> Union[bool, int]:
+                  domains: Dict[str, List[str]],
+                  trail: Optional[Trail] = None) -> Union[bool, int]:
     """
     Convenience function for AC-3 inference.
     
@@ -219,8 +536,35 @@ def ac3_inference(csp: CSPModel, variable: str, value: str,
         value: Assigned value
         assignment: Current assignment
         domains: Current domains
+        trail: Optional undo log of the removals (see undo_trail)
+        
+    Returns:
+        False if domain wipeout, else number of pruned values
+    """
+    return AC3.infer(csp, variable, value, assignment, domains, trail)
+
+
+def ac4_inference(csp: CSPModel, variable: str, value: str,
+                  assignment: Dict[str, str],
+                  domains: Dict[str, List[str]],
+                  trail: Optional[Trail] = None) -> Union[bool, int]:
+    """
+    Convenience function for AC-4 inference.
+    
+    Builds the support counters for this call only, so its removals
+    are undone with undo_trail. BacktrackingSolver recognizes this
+    function and keeps one AC4 across the search instead.
+    
+    Args:
+        csp: CSP model
+        variable: Just-assigned variable
+        value: Assigned value
+        assignment: Current assignment
+        domains: Current domains
+        trail: Optional undo log of the removals (see undo_trail)
         
     Returns:
         False if domain wipeout, else number of pruned values
     """
-    return AC3.infer(csp, variable, value, assignment, domains)
+    return AC4(csp, domains).infer(csp, variable, value, assignment,
+                                   domains, trail)
@@ -0,0 +1,29 @@
+"""
+JIT Module - Optional Numba compilation for solver kernels.
+
+Numba is an optional dependency. Its presence is detected without
+importing it, so importing the solver stays cheap; numba itself is
+only loaded when solver.kernels is first imported. Without numba,
+``njit`` returns functions unchanged and callers should prefer the
+pure-Python solver path (check ``HAS_NUMBA``).
+"""
+
+from importlib.util import find_spec
+
+HAS_NUMBA = find_spec('numba') is not None
+
+
+def njit(*args, **kwargs):
+    """
+    Compile a function with Numba if available.
+    
+    Usable both bare (``@njit``) and with options
+    (``@njit(cache=True)``), mirroring ``numba.njit``.
+    """
+    if HAS_NUMBA:
+        from numba import njit as numba_njit
+        return numba_njit(*args, **kwargs)
+    
+    if len(args) == 1 and callable(args[0]) and not kwargs:
+        return args[0]
+    return lambda func: func
@@ -0,0 +1,306 @@
+"""
+Kernels Module - Compiled search and propagation kernels.
+
+Integer-array versions of the solver's hot loops, compiled with Numba
+when it is installed (see solver.jit). They operate on the CSR
+adjacency from CSPModel.neighbors_csr, uint32 domain bitmasks from
+CSPModel.domain_masks() and int8 assignment arrays (-1 = unassigned).
+
+This module imports numba, so the solver only imports it lazily when
+a compiled path is requested.
+"""
+
+import numpy as np
+
+from solver import bitmask
+from solver.jit import njit
+
+
+# Indices into the int64 stats array filled by backtrack_search
+NODES, BACKTRACKS, INFERENCE_CALLS, PRUNED = range(4)
+
+popcount = njit(cache=True)(bitmask.popcount)
+
+
+@njit(cache=True)
+def fc_prune(indptr, indices, dom_mask, sizes, assignment, var, color,
+             trail, top):
+    """
+    Forward checking on bitmask domains.
+    
+    Clears ``color`` from every unassigned neighbor of ``var``, keeps
+    ``sizes`` (the popcount of each mask) in step and pushes each
+    pruned neighbor onto ``trail`` so the caller can restore it with
+    ``dom_mask[u] |= 1 << color``.
+    
+    Returns:
+        (ok, top, pruned) where ok is False on domain wipeout
+    """
+    bit = np.uint32(1) << np.uint32(color)
+    pruned = 0
+    for p in range(indptr[var], indptr[var + 1]):
+        u = indices[p]
+        if assignment[u] < 0 and dom_mask[u] & bit:
+            dom_mask[u] &= ~bit
+            sizes[u] -= 1
+            trail[top] = u
+            top += 1
+            pruned += 1
+            if dom_mask[u] == 0:
+                return False, top, pruned
+    return True, top, pruned
+
+
+@njit(cache=True)
+def ac3_enforce(indptr, indices, arc_src, arc_reverse, dom_mask, assignment,
+                queue, in_queue):
+    """
+    AC-3 on bitmask domains for not-equal constraints.
+    
+    Arcs are identified by their CSR position (see CSPModel.arc_src and
+    CSPModel.arc_reverse). ``queue`` is a ring buffer of arc ids and
+    ``in_queue`` flags the arcs it holds, so an arc is never queued
+    twice and both buffers need exactly one slot per arc.
+    
+    Returns:
+        (ok, pruned) where ok is False on domain wipeout
+    """
+    n_arcs = indices.shape[0]
+    for a in range(n_arcs):
+        queue[a] = a
+        in_queue[a] = True
+    head = 0
+    size = n_arcs
+    
+    pruned = 0
+    while size > 0:
+        a = queue[head]
+        head += 1
+        if head == n_arcs:
+            head = 0
+        size -= 1
+        in_queue[a] = False
+        
+        xi = arc_src[a]
+        if assignment[xi] >= 0:
+            continue
+        
+        # Only a singleton (or empty) Xj can remove values from Xi
+        xj = indices[a]
+        dj = dom_mask[xj]
+        if dj & (dj - np.uint32(1)):
+            continue
+        di = dom_mask[xi]
+        remaining = np.uint32(di & ~dj) if dj else np.uint32(0)
+        if remaining == di:
+            continue
+        
+        dom_mask[xi] = remaining
+        pruned += popcount(di) - popcount(remaining)
+        if remaining == 0:
+            return False, pruned
+        # Arcs into Xi can only revise once Xi is a singleton
+        if remaining & (remaining - np.uint32(1)):
+            continue
+        
+        # Re-queue (xk, xi), the opposite of each outgoing arc (xi, xk)
+        for p in range(indptr[xi], indptr[xi + 1]):
+            if indices[p] == xj:
+                continue
+            back = arc_reverse[p]
+            if not in_queue[back]:
+                in_queue[back] = True
+                tail = head + size
+                if tail >= n_arcs:
+                    tail -= n_arcs
+                queue[tail] = back
+                size += 1
+    return True, pruned
+
+
+@njit(cache=True)
+def select_variable(sizes, assignment, use_mrv, min_size):
+    """
+    First unassigned variable, or the one with fewest values (MRV).
+    
+    ``sizes`` holds the current domain sizes. No unassigned variable
+    can have fewer than ``min_size`` values, so the MRV scan stops at
+    the first variable that reaches it.
+    """
+    best_var = -1
+    best_size = 33
+    for v in range(sizes.shape[0]):
+        if assignment[v] >= 0:
+            continue
+        if not use_mrv:
+            return v
+        size = sizes[v]
+        if size < best_size:
+            best_size = size
+            best_var = v
+            if size <= min_size:
+                break
+    return best_var
+
+
+@njit(cache=True)
+def neighbor_colors(indptr, indices, assigned_bits, var):
+    """
+    OR together the one-hot colors of var's neighbors.
+    
+    Branchless: ``neighbor_colors(...) & (1 << c) == 0`` means color
+    ``c`` is consistent for ``var``.
+    """
+    used = np.uint32(0)
+    for p in range(indptr[var], indptr[var + 1]):
+        used |= assigned_bits[indices[p]]
+    return used
+
+
+@njit(cache=True)
+def undo_level(dom_mask, sizes, assignment, assigned_bits, trail, start,
+               top, var):
+    """Unassign var and give its color back to the neighbors it pruned."""
+    bit = assigned_bits[var]
+    for t in range(start, top):
+        dom_mask[trail[t]] |= bit
+        sizes[trail[t]] += 1
+    assignment[var] = -1
+    assigned_bits[var] = 0
+    return start
+
+
+@njit(cache=True)
+def backtrack_search(indptr, indices, dom_mask, assignment, k,
+                     use_mrv, use_fc, max_nodes, stats):
+    """
+    Iterative backtracking search over integer arrays.
+    
+    Explores the same tree, in the same order, as the Python solver
+    configured with first-unassigned or MRV selection, domain value
+    order, and optional forward checking.
+    
+    Args:
+        indptr, indices: CSR adjacency of the constraint graph
+        dom_mask: uint32[n] domain bitmasks (modified, restored on undo)
+        assignment: int8[n] color ids, -1 = unassigned (filled in)
+        k: Number of colors
+        use_mrv: Select variables by minimum remaining values
+        use_fc: Apply forward checking after each assignment
+        max_nodes: Maximum nodes to explore before giving up
+        stats: int64[4] nodes/backtracks/inference calls/pruned values
+        
+    Returns:
+        True if assignment holds a complete solution
+    """
+    n = dom_mask.shape[0]
+    # Domain sizes, updated incrementally by fc_prune/undo_level
+    sizes = np.empty(n, np.int32)
+    for v in range(n):
+        sizes[v] = popcount(dom_mask[v])
+    # Wipeouts are undone at once, so only an initially empty domain
+    # can make an unassigned variable smaller than one value
+    min_size = 1
+    if n > 0 and sizes.min() == 0:
+        min_size = 0
+    # One-hot copy of the assignment (0 = unassigned) for bit tests
+    assigned_bits = np.zeros(n, np.uint32)
+    order = np.empty(n, np.int32)
+    next_val = np.zeros(n, np.int32)
+    blocked = np.zeros(n, np.uint32)
+    # Per-level delta list: neighbors pruned by each level's assignment
+    trail = np.empty(n * k + 1, np.int32)
+    trail_start = np.zeros(n, np.int32)
+    top = 0
+    depth = 0
+    entering = True
+    
+    while depth >= 0:
+        if entering:
+            entering = False
+            if stats[NODES] < max_nodes:
+                if depth == n:
+                    return True
+                stats[NODES] += 1
+                var = select_variable(sizes, assignment, use_mrv, min_size)
+                order[depth] = var
+                next_val[depth] = 0
+                # Neighbors stay fixed while this level tries its values
+                blocked[depth] = neighbor_colors(indptr, indices,
+                                                 assigned_bits, var)
+            else:
+                depth -= 1
+                if depth >= 0:
+                    top = undo_level(dom_mask, sizes, assignment,
+                                     assigned_bits, trail, trail_start[depth],
+                                     top, order[depth])
+                    stats[BACKTRACKS] += 1
+                continue
+        
+        var = order[depth]
+        advanced = False
+        c = next_val[depth]
+        while c < k:
+            bit = np.uint32(1) << np.uint32(c)
+            if dom_mask[var] & bit and not blocked[depth] & bit:
+                assignment[var] = c
+                assigned_bits[var] = bit
+                trail_start[depth] = top
+                ok = True
+                if use_fc:
+                    stats[INFERENCE_CALLS] += 1
+                    ok, top, pruned = fc_prune(
+                        indptr, indices, dom_mask, sizes, assignment,
+                        var, c, trail, top)
+                    if ok:
+                        stats[PRUNED] += pruned
+                if ok:
+                    next_val[depth] = c + 1
+                    depth += 1
+                    entering = True
+                    advanced = True
+                    break
+                top = undo_level(dom_mask, sizes, assignment,
+                                 assigned_bits, trail, trail_start[depth],
+                                 top, var)
+                stats[BACKTRACKS] += 1
+            c += 1
+        
+        if not advanced:
+            depth -= 1
+            if depth >= 0:
+                top = undo_level(dom_mask, sizes, assignment,
+                                 assigned_bits, trail, trail_start[depth],
+                                 top, order[depth])
+                stats[BACKTRACKS] += 1
+    
+    return False
+
+
+_warmed_up = False
+
+
+def warm_up():
+    """
+    Compile every kernel once on a two-region map.
+    
+    With cache=True, later processes load the machine code from disk
+    instead of recompiling, so this mostly costs a cache load. Call it
+    before timing compiled solves so the first run is not charged
+    for compilation.
+    """
+    global _warmed_up
+    if _warmed_up:
+        return
+    
+    indptr = np.array([0, 1, 2], dtype=np.int32)
+    indices = np.array([1, 0], dtype=np.int32)
+    dom_mask = np.full(2, 0b11, dtype=np.uint32)
+    assignment = np.full(2, -1, dtype=np.int8)
+    stats = np.zeros(4, dtype=np.int64)
+    ac3_enforce(indptr, indices, np.array([0, 1], dtype=np.int32),
+                np.array([1, 0], dtype=np.int32), dom_mask, assignment,
+                np.empty(2, dtype=np.int32), np.empty(2, dtype=np.bool_))
+    backtrack_search(indptr, indices, dom_mask, assignment, 2,
+                     True, True, 100, stats)
+    _warmed_up = True
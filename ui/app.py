@@ -6,12 +6,14 @@ Supports multiple solving algorithms with performance comparison.
 """
 
 import streamlit as st
+import hashlib
 import json
 import sys
 import os
-import pandas as pd
-import time
-import tracemalloc
+import multiprocessing
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 
 # Add parent directory to path for imports
@@ -19,11 +21,15 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from csp.model import CSPModel, DEFAULT_COLORS
 from solver.backtracking import BacktrackingSolver
-from solver.inference import forward_checking, ac3_inference
+from solver.jit import HAS_NUMBA
+from solver.inference import forward_checking, ac3_inference, ac4_inference
 from solver.heuristics import (
-    mrv, degree_heuristic, mrv_with_degree_tiebreaker,
+    first_unassigned, mrv, degree_heuristic, mrv_with_degree_tiebreaker,
     lcv, no_order
 )
+from evaluation.benchmark import (
+    solve_and_time, measure_peak_memory, solve_config
+)
 from visualization.plotter import GraphRenderer
 
 
@@ -83,6 +89,15 @@ st.markdown("""
         transition: all 0.3s ease;
         height: 100%;
     }
+    .metric-row {
+        display: flex;
+        gap: 1rem;
+        margin-bottom: 1.5rem;
+    }
+    .metric-row .metric-card {
+        flex: 1;
+        min-width: 0;
+    }
     .metric-card:hover {
         background: rgba(255, 255, 255, 0.05);
         transform: translateY(-5px);
@@ -145,9 +160,12 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-def load_predefined_maps():
-    """Load predefined maps from JSON file."""
-    maps_path = Path(__file__).parent.parent / 'data' / 'maps.json'
+_MAPS_PATH = str(Path(__file__).parent.parent / 'data' / 'maps.json')
+
+
+@st.cache_data(show_spinner=False)
+def load_predefined_maps(maps_path: str = _MAPS_PATH):
+    """Load predefined maps from JSON file, once per server process."""
     try:
         with open(maps_path, 'r') as f:
             return json.load(f)
@@ -156,86 +174,254 @@ def load_predefined_maps():
         return {}
 
 
+@st.cache_data(show_spinner=False)
+def get_map_options(maps_path: str = _MAPS_PATH) -> list:
+    """
+    (display name, key) of every predefined map, in file order.
+    
+    The sidebar only needs these pairs, so reruns unpickle this short
+    list rather than the full maps data.
+    """
+    return [(data.get('name', key), key)
+            for key, data in load_predefined_maps(maps_path).items()]
+
+
+@st.cache_data(show_spinner=False)
+def load_csp(maps_path: str, key: str) -> CSPModel:
+    """
+    Build the CSP for a predefined map, once per map.
+    
+    Streamlit hands each rerun its own copy, so solving (which resets
+    the domains to the sidebar palette) never touches the cached model.
+    """
+    return CSPModel.from_json(maps_path, key)
+
+
+# Smallest map for which comparison runs are spread over processes
+_PARALLEL_MIN_REGIONS = 50
+
+# Distinct (map, settings) results kept by the result caches
+_RESULT_CACHE_ENTRIES = 256
+
+# Map images match what st.pyplot rendered: 8x6 inches at 200 dpi
+_MAP_FIGSIZE = (8, 6)
+_MAP_DPI = 200
+
+# "Compare All Algorithms" runs: (name, var heuristic, value heuristic, inference)
+_COMPARISON_CONFIGS = [
+    ("Backtracking Only", "None", "None", "None"),
+    ("BT + FC", "None", "None", "Forward Checking"),
+    ("BT + MRV", "MRV", "None", "None"),
+    ("BT + MRV + LCV", "MRV", "LCV", "None"),
+    ("BT + FC + MRV", "MRV", "None", "Forward Checking"),
+    ("BT + AC-3 + MRV + LCV", "MRV", "LCV", "AC-3"),
+]
+
+# Sidebar labels -> solver components
+_VAR_HEURISTICS = {
+    "None": first_unassigned,
+    "MRV": mrv,
+    "Degree": degree_heuristic,
+    "MRV + Degree": mrv_with_degree_tiebreaker,
+}
+_VAL_HEURISTICS = {
+    "None": no_order,
+    "LCV": lcv,
+}
+_INFERENCES = {
+    "None": None,
+    "Forward Checking": forward_checking,
+    "AC-3": ac3_inference,
+    "AC-4": ac4_inference,
+}
+
+
+def solver_options(var_heuristic: str, val_heuristic: str,
+                   inference_type: str, use_jit: bool = False) -> dict:
+    """Map sidebar labels to BacktrackingSolver keyword arguments."""
+    return {
+        'inference': _INFERENCES.get(inference_type),
+        'select_variable': _VAR_HEURISTICS.get(var_heuristic),
+        'order_values': _VAL_HEURISTICS.get(val_heuristic),
+        'use_jit': use_jit,
+    }
+
+
 def create_solver(var_heuristic: str, val_heuristic: str, 
-                  inference_type: str) -> BacktrackingSolver:
+                  inference_type: str,
+                  use_jit: bool = False) -> BacktrackingSolver:
     """Create a solver with specified configuration."""
+    return BacktrackingSolver(
+        **solver_options(var_heuristic, val_heuristic, inference_type,
+                         use_jit)
+    )
+
+
+def compare_configs(csp: CSPModel, configs: list, progress) -> list:
+    """
+    Solve and time every (name, var, val, inference) config.
     
-    # Variable selection heuristic
-    select_var = None
-    if var_heuristic == "MRV":
-        select_var = mrv
-    elif var_heuristic == "Degree":
-        select_var = degree_heuristic
-    elif var_heuristic == "MRV + Degree":
-        select_var = mrv_with_degree_tiebreaker
+    Configs are independent, so on maps large enough to outweigh
+    worker start-up they run in parallel processes, at most one per
+    CPU. Workers are spawned, not forked: the Streamlit server is
+    multithreaded, and forking it can copy locks held by other threads.
+    Falls back to running in this process where process pools are
+    unavailable.
+    """
+    tasks = [(csp, solver_options(var_h, val_h, inf))
+             for _, var_h, val_h, inf in configs]
+    results = [None] * len(tasks)
+    workers = min(len(tasks), os.cpu_count() or 1)
     
-    # Value ordering heuristic
-    order_val = None
-    if val_heuristic == "LCV":
-        order_val = lcv
-    elif val_heuristic == "None":
-        order_val = no_order
+    if workers > 1 and len(csp.variables) >= _PARALLEL_MIN_REGIONS:
+        try:
+            with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = {executor.submit(solve_config, task): i
+                           for i, task in enumerate(tasks)}
+                for done, future in enumerate(as_completed(futures), 1):
+                    results[futures[future]] = future.result()
+                    progress.progress(done / len(tasks))
+            return results
+        except (OSError, BrokenProcessPool):
+            pass
     
-    # Inference method
-    inference = None
-    if inference_type == "Forward Checking":
-        inference = forward_checking
-    elif inference_type == "AC-3":
-        inference = ac3_inference
+    for i, task in enumerate(tasks):
+        results[i] = solve_config(task)
+        progress.progress((i + 1) / len(tasks))
+    return results
+
+
+def upload_key(map_json: bytes) -> str:
+    """Map key of an uploaded file: a digest of its bytes."""
+    return 'upload:' + hashlib.blake2b(map_json, digest_size=16).hexdigest()
+
+
+def map_csp(map_key: str, map_json: bytes) -> CSPModel:
+    """Build the CSP for a predefined map key or uploaded JSON bytes."""
+    if map_json:
+        return CSPModel.from_dict(json.loads(map_json))
+    return load_csp(_MAPS_PATH, map_key)
+
+
+@st.cache_data(show_spinner=False, max_entries=_RESULT_CACHE_ENTRIES)
+def cached_solve(map_key: str, _map_json: bytes, num_colors: int,
+                 var_heuristic: str, val_heuristic: str,
+                 inference_type: str, profile_memory: bool = False,
+                 use_jit: bool = False) -> dict:
+    """
+    Solve and time one configuration, once per inputs.
     
-    return BacktrackingSolver(
-        inference=inference,
-        select_variable=select_var,
-        order_values=order_val
-    )
+    Solving is deterministic, so clicking Solve again with the same map
+    and settings shows the first run's results (and timings). Maps are
+    identified by map_key, a predefined key or upload_key(); the bytes
+    of an uploaded file are passed as _map_json, which Streamlit leaves
+    out of the cache key. With profile_memory, an extra traced solve
+    fills 'memory_peak' (otherwise None). With use_jit, the Numba
+    kernel is compiled before the timed solve.
+    """
+    csp = map_csp(map_key, _map_json)
+    csp.reset_domains(num_colors)
+    
+    solver = create_solver(var_heuristic, val_heuristic, inference_type,
+                           use_jit)
+    if use_jit:
+        BacktrackingSolver.warm_up_jit()
+    results = solve_and_time(csp, solver)
+    results['memory_peak'] = (measure_peak_memory(csp, solver)
+                              if profile_memory else None)
+    return results
 
 
-def solve_and_measure(csp: CSPModel, solver: BacktrackingSolver):
-    """Solve CSP and measure performance."""
-    tracemalloc.start()
-    start_time = time.time()
+@st.cache_data(show_spinner=False, max_entries=_RESULT_CACHE_ENTRIES)
+def cached_comparison(map_key: str, _map_json: bytes, num_colors: int) -> list:
+    """
+    Run every comparison config, once per map and palette size.
     
-    solution = solver.solve(csp)
+    Maps are identified as in cached_solve. The progress bar is
+    created in here so that Streamlit can replay it (already complete
+    and cleared) when the results come from the cache.
+    """
+    csp = map_csp(map_key, _map_json)
+    csp.reset_domains(num_colors)
     
-    end_time = time.time()
-    current, peak = tracemalloc.get_traced_memory()
-    tracemalloc.stop()
+    progress = st.progress(0)
+    results = compare_configs(csp, _COMPARISON_CONFIGS, progress)
+    progress.empty()
+    return results
+
+
+@st.cache_data(show_spinner=False, max_entries=_RESULT_CACHE_ENTRIES)
+def render_map(map_key: str, _map_json: bytes, assignment: Optional[tuple],
+               title: str) -> bytes:
+    """
+    Draw a map as PNG bytes, once per map, coloring and title.
     
-    stats = solver.get_stats()
+    Reruns show the cached image instead of redrawing the graph and
+    re-encoding the figure. assignment holds sorted (region, color)
+    pairs so that it can be hashed, or None for the unsolved map. Maps
+    are identified as in cached_solve.
+    """
+    csp = map_csp(map_key, _map_json)
+    renderer = GraphRenderer(figsize=_MAP_FIGSIZE)
+    fig = renderer.draw_graph(
+        csp,
+        assignment=dict(assignment) if assignment else None,
+        title=title
+    )
+    return renderer.get_figure_bytes(fig, dpi=_MAP_DPI)
+
+
+@st.cache_data(show_spinner=False, max_entries=_RESULT_CACHE_ENTRIES)
+def comparison_chart(df_comparison):
+    """
+    Altair bar chart of the comparison times, once per comparison table.
     
-    return {
-        'solution': solution,
-        'time': end_time - start_time,
-        'memory_peak': peak / 1024 / 1024,  # Convert to MB
-        'nodes': stats.nodes_explored,
-        'backtracks': stats.backtracks,
-        'inference_calls': stats.inference_calls,
-        'pruned': stats.pruned_values
-    }
+    Building the Vega-Lite spec costs more than fetching it from the
+    cache, and repeated comparisons of a map yield the same table.
+    """
+    import altair as alt
+    
+    return alt.Chart(df_comparison).mark_bar(
+        cornerRadiusTopLeft=10,
+        cornerRadiusTopRight=10
+    ).encode(
+        x=alt.X('Algorithm:N', sort=None, axis=alt.Axis(labelAngle=-45, labelOverlap=False)),
+        y=alt.Y('Time (ms):Q', title='Execution Time (ms)'),
+        color=alt.Color('Algorithm:N', scale=alt.Scale(scheme='tableau20'), legend=None),
+        tooltip=['Algorithm', 'Time (ms)', 'Nodes', 'Backtracks']
+    ).properties(
+        height=400,
+        title='Algorithm Speed Comparison'
+    ).configure_title(
+        fontSize=20,
+        font='Outfit',
+        anchor='start',
+        color='#e2e8f0'
+    ).configure_view(strokeWidth=0)
 
 
 def display_metrics(results: dict):
-    """Display performance metrics using custom HTML cards."""
-    m1, m2, m3, m4 = st.columns(4)
-    
+    """Display performance metrics as one row of custom HTML cards."""
     metrics = [
         ("⏱️ Time", f"{results['time']*1000:.3f} ms"),
         ("🔍 Nodes", f"{results['nodes']:,}"),
         ("↩️ Backtracks", f"{results['backtracks']:,}"),
-        ("💾 Memory", f"{results['memory_peak']:.4f} MB")
+        ("💾 Memory", f"{results['memory_peak']:.4f} MB"
+         if results['memory_peak'] is not None else "Not profiled")
     ]
     
-    cols = [m1, m2, m3, m4]
-    for col, (label, value) in zip(cols, metrics):
-        with col:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-label">{label}</div>
-                <div class="metric-value">{value}</div>
-            </div>
-            """, unsafe_allow_html=True)
-    
-    st.markdown("<br>", unsafe_allow_html=True)
+    # A single element for the whole row instead of one per card
+    cards = "".join(
+        f'<div class="metric-card">'
+        f'<div class="metric-label">{label}</div>'
+        f'<div class="metric-value">{value}</div>'
+        f'</div>'
+        for label, value in metrics
+    )
+    st.markdown(f'<div class="metric-row">{cards}</div>',
+                unsafe_allow_html=True)
 
 
 def main():
@@ -255,7 +441,7 @@ def main():
         
         # Map Selection
         st.subheader("📍 Map Selection")
-        maps_data = load_predefined_maps()
+        map_options = get_map_options()
         
         map_source = st.radio(
             "Map Source",
@@ -263,15 +449,21 @@ def main():
         )
         
         csp = None
+        map_key, map_json = '', b''
         
-        if map_source == "Predefined Maps" and maps_data:
-            map_options = {v.get('name', k): k for k, v in maps_data.items()}
-            selected_name = st.selectbox("Select Map", list(map_options.keys()))
-            selected_key = map_options[selected_name]
+        if map_source == "Predefined Maps" and map_options:
+            selected_name = st.selectbox(
+                "Select Map", [name for name, _ in map_options]
+            )
+            selected_key = dict(map_options)[selected_name]
             
             if selected_key:
-                maps_path = Path(__file__).parent.parent / 'data' / 'maps.json'
-                csp = CSPModel.from_json(str(maps_path), selected_key)
+                # Keep the model across reruns until another map is picked
+                if st.session_state.get('csp_key') != selected_key:
+                    st.session_state.csp = load_csp(_MAPS_PATH, selected_key)
+                    st.session_state.csp_key = selected_key
+                csp = st.session_state.csp
+                map_key = selected_key
                 
                 st.info(f"**Regions:** {len(csp.variables)}  \n**Constraints:** {len(csp.constraints)}")
         
@@ -279,8 +471,15 @@ def main():
             uploaded_file = st.file_uploader("Upload JSON Map", type=['json'])
             if uploaded_file:
                 try:
-                    map_data = json.load(uploaded_file)
-                    csp = CSPModel.from_dict(map_data)
+                    # Parse only when the file's content changes
+                    raw = uploaded_file.getvalue()
+                    key = upload_key(raw)
+                    if st.session_state.get('csp_key') != key:
+                        map_data = json.loads(raw)
+                        st.session_state.csp = CSPModel.from_dict(map_data)
+                        st.session_state.csp_key = key
+                    csp = st.session_state.csp
+                    map_key, map_json = key, raw
                     st.success(f"Loaded: {len(csp.variables)} regions")
                 except Exception as e:
                     st.error(f"Error loading map: {e}")
@@ -304,10 +503,25 @@ def main():
         
         inference_type = st.selectbox(
             "Inference",
-            ["None", "Forward Checking", "AC-3"],
+            ["None", "Forward Checking", "AC-3", "AC-4"],
             index=2
         )
         
+        # The kernel covers only some settings; others would silently
+        # run the Python solver, so the toggle is disabled for them
+        jit_supported = create_solver(var_heuristic, val_heuristic,
+                                      inference_type, use_jit=True).runs_jit
+        use_jit = st.checkbox(
+            "Use JIT solver", value=False, disabled=not jit_supported,
+            help="Solve with the Numba-compiled kernel. Needs numba, None "
+                 "or MRV selection, no value ordering, and no inference or "
+                 "Forward Checking. Compare always uses the Python solver."
+        ) and jit_supported
+        if HAS_NUMBA and not jit_supported:
+            st.caption("JIT solver unavailable for these settings: it runs "
+                       "None or MRV selection, no value ordering, and no "
+                       "inference or Forward Checking.")
+        
         st.divider()
         
         # Color configuration
@@ -316,6 +530,12 @@ def main():
         available_colors = DEFAULT_COLORS[:num_colors]
         st.write(", ".join(available_colors))
         
+        # tracemalloc slows the profiled solve, so it is opt-in
+        profile_memory = st.checkbox(
+            "Profile memory", value=False,
+            help="Run the solve again under tracemalloc to report peak memory"
+        )
+        
         st.divider()
         
         # Solve button
@@ -365,27 +585,39 @@ def main():
 ''', language='json')
         return
     
+    # Solve on button click; the last results stay on screen across
+    # reruns for as long as the map and settings match them
+    solve_key = (map_key, num_colors, var_heuristic, val_heuristic,
+                 inference_type, profile_memory, use_jit)
+    if solve_button:
+        with st.spinner("Solving..."):
+            results = cached_solve(map_key, map_json, num_colors,
+                                   var_heuristic, val_heuristic,
+                                   inference_type, profile_memory, use_jit)
+        st.session_state.results = results
+        st.session_state.results_key = solve_key
+    elif st.session_state.get('results_key') == solve_key:
+        results = st.session_state.results
+    else:
+        results = None
+    
     # Create two columns for visualization
     col1, col2 = st.columns([1.2, 1])
     
-    # Show unsolved map
-    renderer = GraphRenderer(figsize=(8, 6))
-    
+    # Show the map: colored once there is a solution, otherwise unsolved
+    solution = results['solution'] if results is not None else None
     with col1:
         st.subheader("🗺️ Map Graph")
-        fig = renderer.draw_graph(csp, title=f"{csp.name}")
-        st.pyplot(fig)
+        if solution:
+            map_png = render_map(map_key, map_json,
+                                 tuple(sorted(solution.items())),
+                                 f"{csp.name} - Solved")
+        else:
+            map_png = render_map(map_key, map_json, None, f"{csp.name}")
+        # Rendered wider than the column, so the default width fills it
+        st.image(map_png)
     
-    # Solve on button click
-    if solve_button:
-        with st.spinner("Solving..."):
-            # Update colors if needed
-            if num_colors != 4:
-                csp.domains = {var: available_colors.copy() for var in csp.variables}
-            
-            solver = create_solver(var_heuristic, val_heuristic, inference_type)
-            results = solve_and_measure(csp, solver)
-        
+    if results is not None:
         if results['solution']:
             st.markdown('<div class="animate-in">', unsafe_allow_html=True)
             st.subheader("📊 Performance Results")
@@ -403,17 +635,11 @@ def main():
             
             st.markdown('</div>', unsafe_allow_html=True)
             
-            # Show solved map
-            with col1:
-                fig_solved = renderer.draw_graph(
-                    csp, 
-                    assignment=results['solution'],
-                    title=f"{csp.name} - Solved"
-                )
-                st.pyplot(fig_solved)
-            
             # Show assignment table
             with st.expander("📋 Color Assignment Details"):
+                # Imported here: pages without results never need pandas
+                import pandas as pd
+                
                 df = pd.DataFrame([
                     {"Region": k, "Color": v} 
                     for k, v in sorted(results['solution'].items())
@@ -422,68 +648,38 @@ def main():
         else:
             st.error("❌ No solution found with current configuration!")
     
-    # Algorithm comparison
-    if compare_button:
+    # Algorithm comparison; like the solve results, the last comparison
+    # stays on screen while the map and palette size match it
+    comparison_key = (map_key, num_colors)
+    shown_key = st.session_state.get('comparison_key')
+    if compare_button or shown_key == comparison_key:
         st.subheader("📊 Algorithm Comparison")
         
-        configs = [
-            ("Backtracking Only", "None", "None", "None"),
-            ("BT + FC", "None", "None", "Forward Checking"),
-            ("BT + MRV", "MRV", "None", "None"),
-            ("BT + MRV + LCV", "MRV", "LCV", "None"),
-            ("BT + FC + MRV", "MRV", "None", "Forward Checking"),
-            ("BT + AC-3 + MRV + LCV", "MRV", "LCV", "AC-3"),
-        ]
-        
-        comparison_results = []
-        progress = st.progress(0)
-        
-        for i, (name, var_h, val_h, inf) in enumerate(configs):
-            # Reset domains for each run
-            csp.domains = {var: available_colors.copy() for var in csp.variables}
-            
-            solver = create_solver(var_h, val_h, inf)
-            results = solve_and_measure(csp, solver)
-            
-            comparison_results.append({
-                'Algorithm': name,
-                'Time (ms)': round(results['time'] * 1000, 3),
-                'Nodes': results['nodes'],
-                'Backtracks': results['backtracks'],
-                'Memory (MB)': round(results['memory_peak'], 4),
-                'Solved': '✅' if results['solution'] else '❌'
-            })
-            
-            progress.progress((i + 1) / len(configs))
-        
-        progress.empty()
+        if compare_button:
+            comparison_results = []
+            for (name, _, _, _), config_results in zip(
+                    _COMPARISON_CONFIGS,
+                    cached_comparison(map_key, map_json, num_colors)):
+                comparison_results.append({
+                    'Algorithm': name,
+                    'Time (ms)': round(config_results['time'] * 1000, 3),
+                    'Nodes': config_results['nodes'],
+                    'Backtracks': config_results['backtracks'],
+                    'Solved': '✅' if config_results['solution'] else '❌'
+                })
+            st.session_state.comparison = comparison_results
+            st.session_state.comparison_key = comparison_key
+        else:
+            comparison_results = st.session_state.comparison
         
         # Display comparison table
+        import pandas as pd
+        
         df_comparison = pd.DataFrame(comparison_results)
         st.dataframe(df_comparison, hide_index=True, use_container_width=True)
         
-        # Enhanced comparison chart with Altair
-        import altair as alt
-        
-        chart = alt.Chart(df_comparison).mark_bar(
-            cornerRadiusTopLeft=10,
-            cornerRadiusTopRight=10
-        ).encode(
-            x=alt.X('Algorithm:N', sort=None, axis=alt.Axis(labelAngle=-45, labelOverlap=False)),
-            y=alt.Y('Time (ms):Q', title='Execution Time (ms)'),
-            color=alt.Color('Algorithm:N', scale=alt.Scale(scheme='tableau20'), legend=None),
-            tooltip=['Algorithm', 'Time (ms)', 'Nodes', 'Backtracks']
-        ).properties(
-            height=400,
-            title='Algorithm Speed Comparison'
-        ).configure_title(
-            fontSize=20,
-            font='Outfit',
-            anchor='start',
-            color='#e2e8f0'
-        ).configure_view(strokeWidth=0)
-        
-        st.altair_chart(chart, use_container_width=True)
+        st.altair_chart(comparison_chart(df_comparison),
+                        use_container_width=True)
 
 
 if __name__ == "__main__":
@@ -2,13 +2,22 @@
 Graph Plotter - Matplotlib visualization for map coloring.
 
 Renders CSP graphs with colored nodes based on solution assignments.
+Figures are drawn on the non-interactive Agg canvas without going
+through pyplot, so rendering for the web never starts a GUI backend
+and figures are freed once unreferenced (no plt.close needed).
 """
 
-import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.transforms import blended_transform_factory
 import networkx as nx
+import numpy as np
 from typing import Dict, Optional, List, Tuple
 import io
+from functools import lru_cache
+from importlib.util import find_spec
 
 
 # Color palette for map coloring visualization
@@ -26,6 +35,65 @@ COLOR_MAP = {
 # Default color for unassigned nodes
 DEFAULT_COLOR = '#BDC3C7'
 
+# Hex codes by color id, with DEFAULT_COLOR as the last (fallback) slot
+_COLOR_INDEX = {name: i for i, name in enumerate(COLOR_MAP)}
+_COLOR_VALUES = np.array(list(COLOR_MAP.values()) + [DEFAULT_COLOR])
+
+# Legend handles by color name. Legends copy their handles' style into
+# artists of their own, so one Patch per color can serve every figure.
+_LEGEND_PATCHES = {name: mpatches.Patch(color=code, label=name)
+                   for name, code in COLOR_MAP.items()}
+
+# From this many nodes on, networkx's spring layout switches to its
+# SciPy sparse solver, which is too slow to wait for (and SciPy is
+# optional), so large graphs get a seeded random layout instead
+_SPRING_MAX_NODES = 500
+
+# Kamada-Kawai needs SciPy; without it the spring layout is used
+_HAS_SCIPY = find_spec('scipy') is not None
+
+# Figure margins in points. With the axes off, these are what
+# tight_layout computes (its pad of 1.08 font sizes, plus room for the
+# titles) without running the layout engine on every draw.
+_MARGIN_PT = 10.8
+_TITLE_PT = 32.24        # 16pt bold title with pad=20
+_PANEL_TITLE_PT = 36.8   # 12pt bold panel titles under the suptitle
+
+
+def _set_margins(fig: Figure, top_pt: float):
+    """Place the single Axes with fixed margins, top_pt extra at the top."""
+    width, height = fig.get_size_inches() * 72
+    fig.subplots_adjust(left=_MARGIN_PT / width,
+                        right=1 - _MARGIN_PT / width,
+                        bottom=_MARGIN_PT / height,
+                        top=1 - (_MARGIN_PT + top_pt) / height)
+
+
+@lru_cache(maxsize=32)
+def _cached_layout(layout: str, nodes: Tuple, edges: frozenset) -> Dict:
+    """
+    Compute node positions, memoized per layout and graph structure.
+    
+    Layouts are seeded (or deterministic), so the same graph always
+    gets the same positions and redrawing it can reuse them.
+    """
+    graph = nx.Graph()
+    graph.add_nodes_from(nodes)
+    graph.add_edges_from(tuple(edge) for edge in edges)
+    
+    if layout == 'kamada_kawai' and _HAS_SCIPY:
+        return nx.kamada_kawai_layout(graph)
+    elif layout == 'circular':
+        return nx.circular_layout(graph)
+    elif layout == 'shell':
+        return nx.shell_layout(graph)
+    
+    if len(nodes) >= _SPRING_MAX_NODES:
+        return nx.random_layout(graph, seed=42)
+    if layout in ('spring', 'kamada_kawai'):
+        return nx.spring_layout(graph, k=2, iterations=50, seed=42)
+    return nx.spring_layout(graph, seed=42)
+
 
 class GraphRenderer:
     """
@@ -35,20 +103,33 @@ class GraphRenderer:
     with customizable layouts and styling.
     """
     
-    def __init__(self, figsize: Tuple[int, int] = (10, 8)):
+    def __init__(self, figsize: Tuple[int, int] = (10, 8),
+                 interactive: bool = False):
         """
         Initialize the renderer.
         
         Args:
             figsize: Figure size as (width, height)
+            interactive: Create figures through pyplot so that
+                plt.show() can display them in a window
         """
         self.figsize = figsize
+        self.interactive = interactive
         self.pos = None
+    
+    def _new_figure(self, figsize: Tuple[float, float]) -> Figure:
+        """Create an empty figure, managed by pyplot only if interactive."""
+        if self.interactive:
+            import matplotlib.pyplot as plt
+            return plt.figure(figsize=figsize)
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        return fig
         
     def draw_graph(self, csp, assignment: Optional[Dict[str, str]] = None,
                    title: Optional[str] = None,
                    show_legend: bool = True,
-                   layout: str = 'spring') -> plt.Figure:
+                   layout: str = 'spring') -> Figure:
         """
         Draw the CSP graph with optional coloring.
         
@@ -62,27 +143,16 @@ class GraphRenderer:
         Returns:
             Matplotlib Figure object
         """
-        fig, ax = plt.subplots(figsize=self.figsize)
+        fig = self._new_figure(self.figsize)
+        ax = fig.add_subplot()
         
         # Get layout
         self.pos = self._get_layout(csp.graph, layout)
         
-        # Get node colors
-        if assignment:
-            node_colors = [
-                COLOR_MAP.get(assignment.get(node), DEFAULT_COLOR)
-                for node in csp.graph.nodes()
-            ]
-        else:
-            node_colors = [DEFAULT_COLOR] * len(csp.graph.nodes())
+        node_colors = self._node_colors(csp.graph, assignment)
         
         # Draw the graph
-        nx.draw_networkx_edges(
-            csp.graph, self.pos, ax=ax,
-            edge_color='#7F8C8D',
-            width=2,
-            alpha=0.7
-        )
+        self._draw_edges(ax, self._edge_segments(csp.graph, self.pos), width=2)
         
         nx.draw_networkx_nodes(
             csp.graph, self.pos, ax=ax,
@@ -112,22 +182,52 @@ class GraphRenderer:
             self._add_legend(ax, assignment)
         
         ax.axis('off')
-        plt.tight_layout()
+        _set_margins(fig, _TITLE_PT if ax.get_title() else 0.0)
         
         return fig
     
     def _get_layout(self, graph: nx.Graph, layout: str) -> Dict:
-        """Get node positions based on layout algorithm."""
-        if layout == 'spring':
-            return nx.spring_layout(graph, k=2, iterations=50, seed=42)
-        elif layout == 'circular':
-            return nx.circular_layout(graph)
-        elif layout == 'kamada_kawai':
-            return nx.kamada_kawai_layout(graph)
-        elif layout == 'shell':
-            return nx.shell_layout(graph)
-        else:
-            return nx.spring_layout(graph, seed=42)
+        """Get node positions based on layout algorithm (cached)."""
+        edges = frozenset(frozenset(edge) for edge in graph.edges())
+        return dict(_cached_layout(layout, tuple(graph.nodes()), edges))
+    
+    @staticmethod
+    def _edge_segments(graph: nx.Graph, pos: Dict) -> np.ndarray:
+        """Endpoint coordinates of every edge, shape (edges, 2, 2)."""
+        index = {node: i for i, node in enumerate(graph)}
+        xy = np.array([pos[node] for node in graph], dtype=float).reshape(-1, 2)
+        ends = np.fromiter((index[node] for edge in graph.edges() for node in edge),
+                           dtype=np.intp, count=2 * graph.number_of_edges())
+        return xy[ends.reshape(-1, 2)]
+    
+    @staticmethod
+    def _draw_edges(ax, segments: np.ndarray, width: float):
+        """Draw edges as one LineCollection behind the nodes."""
+        if not len(segments):
+            return
+        ax.add_collection(LineCollection(segments, colors='#7F8C8D',
+                                         linewidths=width, alpha=0.7,
+                                         zorder=1))
+        # Pad the view by 5% of the edge extent, as networkx does
+        points = segments.reshape(-1, 2)
+        low, high = points.min(axis=0), points.max(axis=0)
+        pad = 0.05 * (high - low)
+        ax.update_datalim((low - pad, high + pad))
+        ax.autoscale_view()
+    
+    @staticmethod
+    def _node_colors(graph: nx.Graph,
+                     assignment: Optional[Dict[str, str]]) -> np.ndarray:
+        """Hex color of every node in graph order (gray if unassigned)."""
+        if not assignment:
+            return np.full(len(graph), DEFAULT_COLOR)
+        fallback = len(COLOR_MAP)
+        idx = np.fromiter(
+            (_COLOR_INDEX.get(assignment.get(node), fallback)
+             for node in graph.nodes()),
+            dtype=np.int32, count=len(graph)
+        )
+        return _COLOR_VALUES[idx]
     
     def _add_legend(self, ax, assignment: Dict[str, str]):
         """Add color legend to the plot."""
@@ -136,8 +236,9 @@ class GraphRenderer:
         
         patches = []
         for color_name in sorted(colors_used):
-            color_code = COLOR_MAP.get(color_name, DEFAULT_COLOR)
-            patch = mpatches.Patch(color=color_code, label=color_name)
+            patch = _LEGEND_PATCHES.get(color_name)
+            if patch is None:
+                patch = mpatches.Patch(color=DEFAULT_COLOR, label=color_name)
             patches.append(patch)
         
         ax.legend(
@@ -147,7 +248,7 @@ class GraphRenderer:
             fontsize=10
         )
     
-    def save_figure(self, fig: plt.Figure, filepath: str, dpi: int = 150):
+    def save_figure(self, fig: Figure, filepath: str, dpi: int = 150):
         """
         Save figure to file.
         
@@ -159,25 +260,32 @@ class GraphRenderer:
         fig.savefig(filepath, dpi=dpi, bbox_inches='tight',
                     facecolor='white', edgecolor='none')
     
-    def get_figure_bytes(self, fig: plt.Figure, format: str = 'png') -> bytes:
+    def get_figure_bytes(self, fig: Figure, format: str = 'png',
+                         dpi: int = 100) -> bytes:
         """
         Get figure as bytes for web display.
         
+        Screen resolution by default; rasterizing dominates the cost,
+        which grows with dpi squared. PNGs are written with fast zlib
+        compression (slightly larger files, less encode time).
+        
         Args:
             fig: Figure to convert
             format: Image format ('png', 'svg', etc.)
+            dpi: Resolution in dots per inch
             
         Returns:
             Bytes representation of the figure
         """
+        extra = {'pil_kwargs': {'compress_level': 1}} if format == 'png' else {}
         buf = io.BytesIO()
-        fig.savefig(buf, format=format, dpi=150, bbox_inches='tight',
-                    facecolor='white', edgecolor='none')
+        fig.savefig(buf, format=format, dpi=dpi, bbox_inches='tight',
+                    facecolor='white', edgecolor='none', **extra)
         buf.seek(0)
         return buf.getvalue()
     
     def draw_comparison(self, csp, assignments: List[Tuple[str, Dict[str, str]]],
-                        title: str = "Algorithm Comparison") -> plt.Figure:
+                        title: str = "Algorithm Comparison") -> Figure:
         """
         Draw multiple solutions side by side for comparison.
         
@@ -190,37 +298,40 @@ class GraphRenderer:
             Matplotlib Figure object
         """
         n = len(assignments)
-        fig, axes = plt.subplots(1, n, figsize=(5 * n, 6))
-        
-        if n == 1:
-            axes = [axes]
-        
-        # Use consistent layout across all subplots
-        pos = nx.spring_layout(csp.graph, k=2, seed=42)
-        
-        for ax, (algo_name, assignment) in zip(axes, assignments):
-            # Get node colors
-            if assignment:
-                node_colors = [
-                    COLOR_MAP.get(assignment.get(node), DEFAULT_COLOR)
-                    for node in csp.graph.nodes()
-                ]
-            else:
-                node_colors = [DEFAULT_COLOR] * len(csp.graph.nodes())
+        fig = self._new_figure((5 * n, 6))
+        # One shared Axes: each panel is the same layout shifted right,
+        # which avoids building (and laying out) an Axes per panel
+        ax = fig.add_subplot()
+        ax.axis('off')
+        
+        # Use consistent layout across all panels
+        pos = self._get_layout(csp.graph, 'spring')
+        xs = [x for x, _ in pos.values()]
+        width = max(max(xs) - min(xs), 1.0) if xs else 1.0
+        stride = 1.25 * width
+        left = min(xs) if xs else 0.0
+        # Titles sit above the panels: x in data, y in axes coordinates
+        title_transform = blended_transform_factory(ax.transData, ax.transAxes)
+        segments = self._edge_segments(csp.graph, pos)
+        
+        for k, (algo_name, assignment) in enumerate(assignments):
+            shift = k * stride
+            pos_k = {node: (x + shift, y) for node, (x, y) in pos.items()}
+            node_colors = self._node_colors(csp.graph, assignment)
             
-            nx.draw_networkx_edges(csp.graph, pos, ax=ax,
-                                   edge_color='#7F8C8D', width=1.5, alpha=0.7)
-            nx.draw_networkx_nodes(csp.graph, pos, ax=ax,
+            self._draw_edges(ax, segments + (shift, 0.0), width=1.5)
+            nx.draw_networkx_nodes(csp.graph, pos_k, ax=ax,
                                    node_color=node_colors, node_size=800,
                                    edgecolors='#2C3E50', linewidths=1.5)
-            nx.draw_networkx_labels(csp.graph, pos, ax=ax,
+            nx.draw_networkx_labels(csp.graph, pos_k, ax=ax,
                                     font_size=9, font_weight='bold',
                                     font_color='white')
             
-            ax.set_title(algo_name, fontsize=12, fontweight='bold')
-            ax.axis('off')
+            ax.text(left + shift + width / 2, 1.0, algo_name,
+                    transform=title_transform, ha='center', va='bottom',
+                    fontsize=12, fontweight='bold')
         
         fig.suptitle(title, fontsize=14, fontweight='bold', y=1.02)
-        plt.tight_layout()
+        _set_margins(fig, _PANEL_TITLE_PT)
         
         return fig